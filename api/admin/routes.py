@@ -1,36 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+import os
+from datetime import datetime, timezone
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    status,
+    Header,
+    Query,
+    Response,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import List, AsyncGenerator
-from fastapi import Request
+from typing import List, Optional
+from pydantic import BaseModel
 
-from api.db.session import SessionLocal
+from api.admin.export import EXPORT_FORMATS, export_users
+from api.core.hashing import PasswordHashingUnavailable
+from api.core.identity import UserIdentity, user_identities
+from api.core.token_cache import token_cache
+from api.db.session import get_db
 from api.db.models import User
-from api.db.schemas import UserOut
+from api.db.provisioning import PROVISIONING_MAX_ROWS, provision_users
+from api.db.schemas import BulkImportResult, BulkUserImport, UserOut
+from api.ml.cache import prompt_cache
+from api.ml.registry import MODEL_SOURCE, registry
 from api.utils.logger import logger
 
 router = APIRouter()
 
+ADMIN_USERS_PAGE_SIZE = int(os.getenv("ADMIN_USERS_PAGE_SIZE", "100"))
+ADMIN_USERS_MAX_PAGE = int(os.getenv("ADMIN_USERS_MAX_PAGE", "1000"))
 
-async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
-    async with SessionLocal() as session:
-        request.state.db = session
-        try:
-            yield session
-            await session.commit()
-        except Exception:
-            await session.rollback()
-            logger.exception("Erreur lors de la gestion de la session DB")
-            raise
-        finally:
-            await session.close()
+# Colonnes de UserOut seulement : ni mot de passe ni clé de chiffrement
+USER_LIST_COLUMNS = (User.id, User.username, User.email, User.role, User.bio)
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Ramène une date avec fuseau en UTC naïf, comme `created_at`."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
 
 
 async def get_admin_user(
-    x_user: str = Header(...), db: AsyncSession = Depends(get_db)
-) -> User:
-    result = await db.execute(select(User).where(User.username == x_user))
-    user = result.scalars().first()
+    x_user: str = Header(...),
+    db: AsyncSession = Depends(get_db, scope="function"),
+) -> UserIdentity:
+    user = await user_identities.get(db, x_user)
     if not user or user.role != "admin":
         logger.warning(f"Tentative d'accès admin refusée pour {x_user}")
         raise HTTPException(
@@ -42,21 +59,93 @@ async def get_admin_user(
 
 @router.get("/users", response_model=List[UserOut])
 async def list_all_users(
-    db: AsyncSession = Depends(get_db), admin: User = Depends(get_admin_user)
+    response: Response,
+    limit: int = Query(ADMIN_USERS_PAGE_SIZE, ge=1, le=ADMIN_USERS_MAX_PAGE),
+    after_id: Optional[int] = Query(None, ge=0),
+    role: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db, scope="function"),
+    admin: UserIdentity = Depends(get_admin_user),
 ):
-    result = await db.execute(select(User))
-    users = result.scalars().all()
+    """
+    Page d'utilisateurs triée par id (pagination par curseur) : passer la
+    valeur de l'en-tête `X-Next-Cursor` en `after_id` pour la page suivante.
+    """
+    query = select(*USER_LIST_COLUMNS).order_by(User.id).limit(limit + 1)
+    if after_id is not None:
+        query = query.where(User.id > after_id)
+    if role is not None:
+        query = query.where(User.role == role)
+    if created_after is not None:
+        query = query.where(User.created_at >= _naive_utc(created_after))
+    if created_before is not None:
+        query = query.where(User.created_at < _naive_utc(created_before))
+    rows = (await db.execute(query)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
     logger.info(
-        f"Admin {admin.username} a listé tous les utilisateurs ({len(users)} trouvés)"
+        f"Admin {admin.username} a listé {len(rows)} utilisateurs "
+        f"(après id={after_id})"
     )
-    return [UserOut.model_validate(u) for u in users]
+    return [row._asdict() for row in rows]
+
+
+@router.get("/users/export")
+async def export_all_users(
+    format: str = Query("ndjson", pattern="^(csv|ndjson)$"),
+    decrypt_bio: bool = False,
+    admin: UserIdentity = Depends(get_admin_user),
+):
+    """Export complet des utilisateurs, en flux (CSV ou NDJSON)."""
+    logger.info(
+        f"Admin {admin.username} a lancé un export des utilisateurs "
+        f"({format}, bios {'déchiffrées' if decrypt_bio else 'omises'})"
+    )
+    return StreamingResponse(
+        export_users(format, decrypt_bio),
+        media_type=EXPORT_FORMATS[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="users.{format}"'
+        },
+    )
+
+
+@router.post("/users/bulk", response_model=BulkImportResult)
+async def bulk_create_users(
+    request: BulkUserImport,
+    db: AsyncSession = Depends(get_db, scope="function"),
+    admin: UserIdentity = Depends(get_admin_user),
+):
+    """
+    Crée jusqu'à PROVISIONING_MAX_ROWS utilisateurs ; les lignes refusées
+    (invalides, déjà prises ou non traitées faute de hachage) sont listées
+    dans `failed`. Un 503 signifie qu'aucun utilisateur n'a été créé.
+    """
+    if len(request.users) > PROVISIONING_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {PROVISIONING_MAX_ROWS} users per request",
+        )
+    nb_users = len(request.users)
+    logger.info(f"Admin {admin.username} provisionne {nb_users} utilisateurs")
+    try:
+        return await provision_users(db, request.users)
+    except PasswordHashingUnavailable as e:
+        logger.warning(f"Provisionnement interrompu : {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Password hashing pool busy, retry later",
+            headers={"Retry-After": "30"},
+        )
 
 
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
     user_id: int,
-    db: AsyncSession = Depends(get_db),
-    admin: User = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db, scope="function"),
+    admin: UserIdentity = Depends(get_admin_user),
 ):
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalars().first()
@@ -69,7 +158,86 @@ async def delete_user(
         )
     await db.delete(user)
     await db.commit()
+    user_identities.invalidate(user.username, reason="delete")
+    token_cache.evict_user(user.username)
     logger.info(
         f"Admin {admin.username} a supprimé l'utilisateur id={user_id}"
     )
     return
+
+
+class IdentityCacheInvalidation(BaseModel):
+    usernames: List[str]
+
+
+@router.post("/identity-cache/invalidate")
+async def invalidate_identity_cache(
+    request: IdentityCacheInvalidation,
+    admin: UserIdentity = Depends(get_admin_user),
+):
+    """
+    Retire des identités du cache de ce processus, après une modification
+    faite hors de l'API (ex. rotation des clés de chiffrement).
+    """
+    for username in request.usernames:
+        user_identities.invalidate(username, reason="admin")
+    logger.info(
+        f"Admin {admin.username} a invalidé {len(request.usernames)} "
+        "identités en cache"
+    )
+    return {"invalidated": len(request.usernames)}
+
+
+class ModelActivateRequest(BaseModel):
+    name: str
+    version: str
+    source: str = MODEL_SOURCE
+
+
+@router.get("/models")
+async def list_models(admin: UserIdentity = Depends(get_admin_user)):
+    logger.info(f"Admin {admin.username} a consulté le cache des modèles")
+    return {"active": registry.active.describe(), "cached": registry.cached()}
+
+
+@router.post("/models/activate")
+async def activate_model(
+    request: ModelActivateRequest,
+    admin: UserIdentity = Depends(get_admin_user),
+):
+    try:
+        loaded = await registry.activate(
+            request.name, request.version, request.source
+        )
+    except Exception as e:
+        logger.error(
+            f"Échec de l'activation du modèle {request.name}:{request.version} : {e}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Erreur lors du chargement du modèle : {str(e)}",
+        )
+    logger.info(
+        f"Admin {admin.username} a activé le modèle {request.name}:{request.version}"
+    )
+    return {"active": loaded.describe()}
+
+
+@router.get("/prompt-cache")
+async def inspect_prompt_cache(
+    limit: int = 100, admin: UserIdentity = Depends(get_admin_user)
+):
+    logger.info(f"Admin {admin.username} a consulté le cache de prompts")
+    return {
+        "stats": prompt_cache.stats(),
+        "entries": prompt_cache.entries(limit),
+    }
+
+
+@router.delete("/prompt-cache")
+async def purge_prompt_cache(admin: UserIdentity = Depends(get_admin_user)):
+    purged = prompt_cache.purge()
+    logger.info(
+        f"Admin {admin.username} a purgé le cache de prompts ({purged} entrées)"
+    )
+    return {"purged": purged}
@@ -1,7 +1,15 @@
+import os
+import threading
+from collections import OrderedDict
 from cryptography.fernet import Fernet, InvalidToken
-from typing import Optional
+from typing import Iterable, List, Optional, Tuple
 from api.utils.logger import logger
 
+FERNET_CACHE_SIZE = int(os.getenv("FERNET_CACHE_SIZE", "1024"))
+
+_fernet_cache: "OrderedDict[str, Fernet]" = OrderedDict()
+_fernet_lock = threading.Lock()
+
 
 def generate_user_key() -> str:
     """Génère une clé de chiffrement unique pour un utilisateur."""
@@ -10,8 +18,54 @@ def generate_user_key() -> str:
     return key
 
 
+def generate_user_keys(count: int) -> List[str]:
+    """Génère `count` clés de chiffrement (provisionnement en masse)."""
+    keys = [Fernet.generate_key().decode() for _ in range(count)]
+    logger.debug(f"{count} clés de chiffrement générées")
+    return keys
+
+
 def get_fernet(key: str) -> Fernet:
-    return Fernet(key.encode())
+    """
+    Renvoie l'objet Fernet d'une clé utilisateur depuis un cache LRU borné
+    (`FERNET_CACHE_SIZE`) : le décodage base64 de la clé et la séparation
+    des demi-clés de signature et de chiffrement ne sont faits qu'une fois.
+    """
+    with _fernet_lock:
+        fernet = _fernet_cache.get(key)
+        if fernet is not None:
+            _fernet_cache.move_to_end(key)
+            return fernet
+    fernet = Fernet(key.encode())
+    with _fernet_lock:
+        _fernet_cache[key] = fernet
+        while len(_fernet_cache) > max(0, FERNET_CACHE_SIZE):
+            _fernet_cache.popitem(last=False)
+    return fernet
+
+
+def _batch_fernet(key: str) -> Fernet:
+    """
+    Objet Fernet pour les traitements par lots (export, provisionnement,
+    rotation) : le cache est lu mais pas alimenté, pour que des milliers de
+    clés vues une seule fois n'évincent pas celles des utilisateurs actifs.
+    """
+    with _fernet_lock:
+        fernet = _fernet_cache.get(key)
+    return fernet if fernet is not None else Fernet(key.encode())
+
+
+def invalidate_fernet(key: Optional[str]) -> None:
+    """Retire une clé du cache, à appeler quand un utilisateur en change."""
+    if not key:
+        return
+    with _fernet_lock:
+        _fernet_cache.pop(key, None)
+
+
+def clear_fernet_cache() -> None:
+    with _fernet_lock:
+        _fernet_cache.clear()
 
 
 def encrypt_sensitive_data(data: str, key: Optional[str]) -> str:
@@ -20,12 +74,8 @@ def encrypt_sensitive_data(data: str, key: Optional[str]) -> str:
     Si aucune clé n'est fournie, renvoie la donnée en clair.
     """
     if not key:
-        logger.debug("Aucune clé d'encryption fournie, donnée non chiffrée")
         return data
-    fernet = get_fernet(key)
-    encrypted = fernet.encrypt(data.encode())
-    logger.debug("Donnée sensible chiffrée")
-    return encrypted.decode()
+    return get_fernet(key).encrypt(data.encode()).decode()
 
 
 def decrypt_sensitive_data(encrypted_data: str, key: Optional[str]) -> str:
@@ -35,20 +85,61 @@ def decrypt_sensitive_data(encrypted_data: str, key: Optional[str]) -> str:
     Si la donnée est vide ou invalide, retourne une chaîne vide.
     """
     if not key:
-        logger.debug(
-            "Aucune clé fournie pour le déchiffrement, donnée renvoyée brute"
-        )
         return encrypted_data
     if not encrypted_data:
-        logger.debug("Donnée chiffrée vide reçue")
         return ""
-    fernet = get_fernet(key)
     try:
-        decrypted = fernet.decrypt(encrypted_data.encode())
-        logger.debug("Donnée sensible déchiffrée")
-        return decrypted.decode()
+        return get_fernet(key).decrypt(encrypted_data.encode()).decode()
     except InvalidToken:
         logger.warning(
             "Échec du déchiffrement : clé invalide ou donnée non chiffrée"
         )
         return ""
+
+
+def encrypt_many(items: Iterable[Tuple[str, Optional[str]]]) -> List[str]:
+    """
+    Chiffre une série de couples (donnée, clé), éventuellement pour des
+    utilisateurs différents, avec un seul objet Fernet par clé distincte.
+    Même contrat que `encrypt_sensitive_data` pour chaque élément.
+    """
+    fernets = {}
+    results = []
+    for data, key in items:
+        if not key:
+            results.append(data)
+            continue
+        fernet = fernets.get(key)
+        if fernet is None:
+            fernet = fernets[key] = _batch_fernet(key)
+        results.append(fernet.encrypt(data.encode()).decode())
+    return results
+
+
+def decrypt_many(items: Iterable[Tuple[str, Optional[str]]]) -> List[str]:
+    """
+    Déchiffre une série de couples (donnée chiffrée, clé) avec un seul objet
+    Fernet par clé distincte. Même contrat que `decrypt_sensitive_data` pour
+    chaque élément ; les échecs sont signalés par un seul avertissement.
+    """
+    fernets = {}
+    results = []
+    nb_failures = 0
+    for encrypted_data, key in items:
+        if not key or not encrypted_data:
+            results.append(encrypted_data if not key else "")
+            continue
+        fernet = fernets.get(key)
+        if fernet is None:
+            fernet = fernets[key] = _batch_fernet(key)
+        try:
+            results.append(fernet.decrypt(encrypted_data.encode()).decode())
+        except InvalidToken:
+            nb_failures += 1
+            results.append("")
+    if nb_failures:
+        logger.warning(
+            f"Échec du déchiffrement de {nb_failures} donnée(s) : "
+            "clé invalide ou donnée non chiffrée"
+        )
+    return results
@@ -0,0 +1,264 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+import multiprocessing
+import bcrypt
+from prometheus_client import Counter, Gauge, Histogram
+from api.utils.logger import logger
+
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "5"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_CALIBRATE = os.getenv("BCRYPT_CALIBRATE", "false").lower() == "true"
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", "50"))
+BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS", "10"))
+BCRYPT_MAX_ROUNDS = 16
+
+PASSWORD_HASH_MODES = ("thread", "process")
+
+HASH_QUEUE_WAIT = Histogram(
+    "password_hash_queue_wait_seconds",
+    "Attente d'un calcul bcrypt avant sa prise en charge par le pool",
+    ["operation"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Durée d'un calcul bcrypt dans le pool de hachage",
+    ["operation"],
+    buckets=(0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 1, 2),
+)
+HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "Calculs bcrypt refusés (pool saturé ou délai dépassé)",
+    ["reason"],
+)
+HASH_IN_FLIGHT = Gauge(
+    "password_hash_in_flight",
+    "Calculs bcrypt en attente ou en cours dans le pool de hachage",
+)
+
+
+class PasswordHashingUnavailable(Exception):
+    """Le pool de hachage est saturé ou n'a pas répondu à temps."""
+
+
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds))
+    return hashed.decode("utf-8")
+
+
+def hash_passwords(passwords: Sequence[str], rounds: int) -> List[str]:
+    return [hash_password(password, rounds) for password in passwords]
+
+
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    """Coût bcrypt d'un hash (`$2b$12$...` -> 12), None s'il est illisible."""
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def calibrate_rounds(
+    target_ms: float = BCRYPT_TARGET_MS,
+    min_rounds: int = BCRYPT_MIN_ROUNDS,
+    max_rounds: int = BCRYPT_MAX_ROUNDS,
+) -> Tuple[int, float]:
+    """
+    Mesure le temps de hachage sur cette machine et renvoie le coût le plus
+    élevé dont le hachage tient dans `target_ms` (jamais moins que
+    `min_rounds`), avec la durée mesurée en millisecondes. Chaque point de
+    coût double le temps de calcul.
+    """
+    rounds = min_rounds
+    elapsed_ms = _measure_ms(rounds)
+    while rounds < max_rounds and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms = _measure_ms(rounds)
+    return rounds, elapsed_ms
+
+
+def _measure_ms(rounds: int) -> float:
+    salt = bcrypt.gensalt(rounds)
+    started = time.perf_counter()
+    bcrypt.hashpw(b"calibration-password", salt)
+    return (time.perf_counter() - started) * 1000
+
+
+def check_password(plain_password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(
+        plain_password.encode("utf-8"), hashed_password.encode("utf-8")
+    )
+
+
+def _timed(
+    fn: Callable[..., Any], submitted_at: float, *args: Any
+) -> Tuple[Any, float, float]:
+    # Horloge murale : comparable entre le processus API et un worker
+    started_at = time.time()
+    result = fn(*args)
+    return result, started_at - submitted_at, time.time() - started_at
+
+
+class PasswordHasher:
+    """
+    Pool borné dédié à bcrypt : le calcul (100 à 300 ms) sort de la boucle
+    d'événements, au plus `max_workers` hachages tournent en parallèle et
+    `max_pending` attendent. Au-delà, ou après `timeout` secondes, l'appel
+    échoue avec `PasswordHashingUnavailable` au lieu de s'accumuler.
+    """
+
+    def __init__(
+        self,
+        mode: str = PASSWORD_HASH_EXECUTOR,
+        max_workers: int = PASSWORD_HASH_WORKERS,
+        max_pending: int = PASSWORD_HASH_MAX_PENDING,
+        timeout: float = PASSWORD_HASH_TIMEOUT,
+    ):
+        if mode not in PASSWORD_HASH_MODES:
+            raise ValueError(f"Mode de hachage inconnu : {mode}")
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(0, max_pending)
+        self.timeout = timeout
+        self._pool: Optional[Executor] = None
+        self.rounds = BCRYPT_ROUNDS
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        if self._pool is not None:
+            return
+        if self.mode == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            # Démarre les workers tout de suite plutôt qu'au premier login
+            for _ in range(self.max_workers):
+                self._pool.submit(time.time)
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="bcrypt"
+            )
+        logger.info(
+            f"Pool de hachage démarré (mode={self.mode}, "
+            f"workers={self.max_workers}, max_pending={self.max_pending})"
+        )
+
+    def shutdown(self) -> None:
+        if self._pool is None:
+            return
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+        logger.info("Pool de hachage arrêté")
+
+    @property
+    def saturated(self) -> bool:
+        """Vrai si un nouvel appel serait refusé faute de place dans le pool."""
+        return self._in_flight >= self.max_workers + self.max_pending
+
+    async def hash(self, password: str) -> str:
+        return await self._submit("hash", hash_password, password, self.rounds)
+
+    async def hash_many(self, passwords: Sequence[str]) -> List[str]:
+        """
+        Hache une série de mots de passe en un bloc par worker : un seul
+        aller-retour vers le pool par bloc plutôt qu'un par mot de passe.
+        """
+        size = -(-len(passwords) // self.max_workers) or 1
+        chunks = await asyncio.gather(
+            *(
+                self._submit(
+                    "hash_many",
+                    hash_passwords,
+                    list(passwords[i : i + size]),
+                    self.rounds,
+                )
+                for i in range(0, len(passwords), size)
+            )
+        )
+        return [hashed for chunk in chunks for hashed in chunk]
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Vrai si le hash a été calculé avec un autre coût que l'actuel."""
+        return hash_rounds(hashed_password) != self.rounds
+
+    async def calibrate(self, target_ms: float = BCRYPT_TARGET_MS) -> int:
+        """Ajuste le coût bcrypt à `target_ms`, mesuré dans le pool."""
+        if self._pool is None:
+            self.start()
+        rounds, elapsed_ms = await asyncio.wrap_future(
+            self._pool.submit(calibrate_rounds, target_ms)
+        )
+        logger.info(
+            f"Coût bcrypt calibré : {rounds} ({elapsed_ms:.0f} ms, "
+            f"cible {target_ms:g} ms, précédent {self.rounds})"
+        )
+        self.rounds = rounds
+        return rounds
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(
+            "verify", check_password, plain_password, hashed_password
+        )
+
+    async def _submit(
+        self, operation: str, fn: Callable[..., Any], *args: Any
+    ) -> Any:
+        if self._pool is None:
+            self.start()
+        if self.saturated:
+            HASH_REJECTED.labels(reason="saturated").inc()
+            logger.warning(f"Pool de hachage saturé ({self._in_flight})")
+            raise PasswordHashingUnavailable("Pool de hachage saturé.")
+        with self._lock:
+            self._in_flight += 1
+        HASH_IN_FLIGHT.inc()
+        task = self._pool.submit(_timed, fn, time.time(), *args)
+        # Libéré à la fin réelle du calcul, même après expiration du délai
+        task.add_done_callback(self._release)
+        try:
+            # Un calcul encore en file est annulé à l'expiration du délai
+            result, queue_wait, duration = await asyncio.wait_for(
+                asyncio.wrap_future(task), self.timeout
+            )
+        except asyncio.TimeoutError:
+            HASH_REJECTED.labels(reason="timeout").inc()
+            logger.warning(f"Hachage '{operation}' abandonné après délai")
+            raise PasswordHashingUnavailable("Délai de hachage dépassé.")
+        HASH_QUEUE_WAIT.labels(operation=operation).observe(queue_wait)
+        HASH_DURATION.labels(operation=operation).observe(duration)
+        return result
+
+    def _release(self, _: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        HASH_IN_FLIGHT.dec()
+
+
+password_hasher = PasswordHasher()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Calibre le coût bcrypt sur cette machine."
+    )
+    parser.add_argument("--target-ms", type=float, default=BCRYPT_TARGET_MS)
+    parser.add_argument("--min-rounds", type=int, default=BCRYPT_MIN_ROUNDS)
+    args = parser.parse_args()
+    rounds, elapsed_ms = calibrate_rounds(args.target_ms, args.min_rounds)
+    print(f"BCRYPT_ROUNDS={rounds}  # {elapsed_ms:.0f} ms par hachage")
@@ -0,0 +1,138 @@
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from prometheus_client import Counter, Gauge
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from api.db.models import User
+from api.utils.logger import logger
+
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+
+USER_CACHE_HITS = Counter(
+    "user_identity_cache_hits_total",
+    "Identités utilisateur servies sans requête à la base",
+)
+USER_CACHE_MISSES = Counter(
+    "user_identity_cache_misses_total",
+    "Identités utilisateur chargées depuis la base",
+)
+USER_CACHE_INVALIDATIONS = Counter(
+    "user_identity_cache_invalidations_total",
+    "Identités utilisateur retirées du cache",
+    ["reason"],
+)
+USER_CACHE_ENTRIES = Gauge(
+    "user_identity_cache_entries",
+    "Nombre d'identités utilisateur en cache",
+)
+
+
+@dataclass(frozen=True)
+class UserIdentity:
+    id: int
+    username: str
+    email: str
+    role: str
+    encryption_key: Optional[str]
+
+
+IDENTITY_COLUMNS = (
+    User.id,
+    User.username,
+    User.email,
+    User.role,
+    User.encryption_key,
+)
+
+
+class UserIdentityCache:
+    """
+    Cache par processus des identités utilisateur (id, rôle, clé...) utilisées
+    par les contrôles d'accès, indexé par username. Une entrée expire après
+    `ttl_seconds` ; les routes qui modifient un utilisateur l'invalident
+    explicitement. Les utilisateurs inconnus ne sont pas mis en cache.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = USER_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = USER_CACHE_TTL_SECONDS,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[UserIdentity, float]]" = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+
+    async def get(
+        self, db: AsyncSession, username: str
+    ) -> Optional[UserIdentity]:
+        """Identité de `username`, depuis le cache ou par une seule requête."""
+        cached = self._entries.get(username)
+        if cached is not None:
+            identity, expires_at = cached
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(username)
+                self.hits += 1
+                USER_CACHE_HITS.inc()
+                return identity
+            self._remove(username, "ttl")
+        self.misses += 1
+        USER_CACHE_MISSES.inc()
+        result = await db.execute(
+            select(*IDENTITY_COLUMNS).where(User.username == username)
+        )
+        row = result.first()
+        if row is None:
+            return None
+        identity = UserIdentity(*row)
+        self.put(identity)
+        return identity
+
+    def put(self, identity: UserIdentity) -> None:
+        self._entries[identity.username] = (
+            identity,
+            time.monotonic() + self.ttl_seconds,
+        )
+        self._entries.move_to_end(identity.username)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)), "lru")
+        USER_CACHE_ENTRIES.set(len(self._entries))
+
+    def invalidate(self, username: str, reason: str = "update") -> None:
+        """À appeler après toute modification ou suppression d'utilisateur."""
+        if username in self._entries:
+            self._remove(username, reason)
+            logger.debug(f"Identité de '{username}' retirée du cache")
+
+    def invalidate_id(self, user_id: int, reason: str = "update") -> None:
+        for username, (identity, _) in list(self._entries.items()):
+            if identity.id == user_id:
+                self.invalidate(username, reason)
+
+    def clear(self) -> None:
+        for username in list(self._entries):
+            self._remove(username, "purge")
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _remove(self, username: str, reason: str) -> None:
+        self._entries.pop(username, None)
+        USER_CACHE_INVALIDATIONS.labels(reason=reason).inc()
+        USER_CACHE_ENTRIES.set(len(self._entries))
+
+
+user_identities = UserIdentityCache()
@@ -0,0 +1,357 @@
+"""
+Rotation des clés de chiffrement utilisateur : chaque utilisateur reçoit une
+nouvelle clé Fernet et ses données chiffrées (bio, refresh token) sont
+rechiffrées avec `MultiFernet.rotate`.
+
+Les utilisateurs sont lus par lots via un curseur côté serveur ; chaque lot
+est réécrit par deux UPDATE groupés dans sa propre transaction, puis un point
+de reprise (dernier id validé) est enregistré. Un lot en échec arrête la
+rotation sans avancer le point de reprise. Les UPDATE ne s'appliquent
+qu'aux lignes encore identiques à la lecture : une ligne modifiée entre-temps
+est laissée sur son ancienne clé et comptée comme conflit. Après chaque lot,
+les identités basculées sont retirées du cache de l'API (POST
+/admin/identity-cache/invalidate sur KEY_ROTATION_API_URL), qui sinon
+déchiffrerait les nouvelles données avec l'ancienne clé.
+
+Usage : python -m api.core.key_rotation [--batch-size 500]
+        [--max-rows-per-second 500] [--checkpoint fichier] [--restart]
+        [--api-url http://api:8000] [--admin-user admin]
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, List, Optional, Sequence, Set, Tuple
+import httpx
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from sqlalchemy import Integer, String, column, update, values
+from sqlalchemy.future import select
+import api.db.session as db_session
+from api.core.crypto import generate_user_key, invalidate_fernet
+from api.core.identity import user_identities
+from api.db.models import User, UserSensitiveData
+from api.utils.logger import logger
+
+KEY_ROTATION_BATCH_SIZE = int(os.getenv("KEY_ROTATION_BATCH_SIZE", "500"))
+KEY_ROTATION_MAX_ROWS_PER_SECOND = float(
+    os.getenv("KEY_ROTATION_MAX_ROWS_PER_SECOND", "500")
+)
+KEY_ROTATION_CHECKPOINT = os.getenv(
+    "KEY_ROTATION_CHECKPOINT", "key_rotation.checkpoint.json"
+)
+# Vide : pas de notification (rotation lancée dans le processus de l'API)
+KEY_ROTATION_API_URL = os.getenv("KEY_ROTATION_API_URL", "http://api:8000")
+KEY_ROTATION_ADMIN_USER = os.getenv("KEY_ROTATION_ADMIN_USER", "admin")
+
+ROTATION_COLUMNS = (
+    User.id,
+    User.username,
+    User.encryption_key,
+    UserSensitiveData.id.label("sensitive_id"),
+    UserSensitiveData.encrypted_bio,
+    UserSensitiveData.encrypted_refresh_token,
+)
+
+
+@dataclass
+class RotationReport:
+    last_id: int = 0
+    scanned: int = 0
+    rotated: int = 0
+    conflicts: int = 0
+    undecryptable: int = 0
+    # Utilisateurs basculés dont l'API n'a pas pu invalider l'identité
+    unnotified: int = 0
+    elapsed: float = 0.0
+    # Renseigné si un lot a échoué : la rotation s'arrête sur ce lot
+    error: Optional[str] = None
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.scanned / self.elapsed if self.elapsed else 0.0
+
+
+@dataclass
+class RotatedRow:
+    user_id: int
+    username: str
+    old_key: str
+    new_key: str
+    # None : pas de ligne user_sensitive_data
+    sensitive: Optional[Tuple[Optional[str], ...]] = None
+
+
+def _rotate_token(multi: MultiFernet, token: Optional[str]) -> Optional[str]:
+    if not token:
+        return token
+    return multi.rotate(token.encode()).decode()
+
+
+def rotate_rows(
+    rows: Sequence[Any],
+) -> Tuple[List[RotatedRow], int]:
+    """
+    Génère une nouvelle clé par utilisateur et rechiffre ses données.
+    Un utilisateur dont une donnée ne se déchiffre pas avec sa clé actuelle
+    est écarté (rien ne serait récupérable après rotation).
+    """
+    rotated = []
+    nb_undecryptable = 0
+    for row in rows:
+        new_key = generate_user_key()
+        multi = MultiFernet(
+            [Fernet(new_key.encode()), Fernet(row.encryption_key.encode())]
+        )
+        sensitive = None
+        if row.sensitive_id is not None:
+            try:
+                sensitive = (
+                    row.encrypted_bio,
+                    row.encrypted_refresh_token,
+                    _rotate_token(multi, row.encrypted_bio),
+                    _rotate_token(multi, row.encrypted_refresh_token),
+                )
+            except InvalidToken:
+                nb_undecryptable += 1
+                logger.warning(
+                    f"Rotation ignorée pour l'utilisateur {row.id} : "
+                    "données non déchiffrables avec sa clé actuelle"
+                )
+                continue
+        rotated.append(
+            RotatedRow(
+                row.id, row.username, row.encryption_key, new_key, sensitive
+            )
+        )
+    return rotated, nb_undecryptable
+
+
+async def apply_rotation(db, rotated: Sequence[RotatedRow]) -> Set[int]:
+    """
+    Écrit un lot en deux UPDATE ... FROM (VALUES ...), à valider par
+    l'appelant. Renvoie les ids effectivement basculés sur leur nouvelle
+    clé ; les autres n'ont pas été modifiés.
+    """
+    sensitive_rows = [r for r in rotated if r.sensitive is not None]
+    eligible = {r.user_id for r in rotated if r.sensitive is None}
+    if sensitive_rows:
+        data = values(
+            column("user_id", Integer),
+            column("old_bio", String),
+            column("old_token", String),
+            column("new_bio", String),
+            column("new_token", String),
+            name="rotated_data",
+        ).data([(r.user_id, *r.sensitive) for r in sensitive_rows])
+        sensitive = UserSensitiveData.__table__
+        result = await db.execute(
+            update(sensitive)
+            .where(
+                sensitive.c.user_id == data.c.user_id,
+                sensitive.c.encrypted_bio.is_not_distinct_from(data.c.old_bio),
+                sensitive.c.encrypted_refresh_token.is_not_distinct_from(
+                    data.c.old_token
+                ),
+            )
+            .values(
+                encrypted_bio=data.c.new_bio,
+                encrypted_refresh_token=data.c.new_token,
+            )
+            .returning(sensitive.c.user_id)
+        )
+        eligible.update(result.scalars().all())
+    keyed = [r for r in rotated if r.user_id in eligible]
+    if not keyed:
+        return set()
+    keys = values(
+        column("id", Integer),
+        column("old_key", String),
+        column("new_key", String),
+        name="rotated_keys",
+    ).data([(r.user_id, r.old_key, r.new_key) for r in keyed])
+    users = User.__table__
+    result = await db.execute(
+        update(users)
+        .where(
+            users.c.id == keys.c.id, users.c.encryption_key == keys.c.old_key
+        )
+        # La rotation n'est pas une modification du profil
+        .values(encryption_key=keys.c.new_key, updated_at=users.c.updated_at)
+        .returning(users.c.id)
+    )
+    switched = set(result.scalars().all())
+    if switched != eligible:
+        # Données rechiffrées mais clé changée ailleurs : lot abandonné
+        raise RuntimeError(
+            "Clés modifiées pendant la rotation : "
+            f"{sorted(eligible - switched)}"
+        )
+    return switched
+
+
+async def notify_api(
+    client: httpx.AsyncClient, admin_user: str, usernames: List[str]
+) -> bool:
+    """Retire `usernames` du cache d'identités de l'API."""
+    try:
+        response = await client.post(
+            "/admin/identity-cache/invalidate",
+            json={"usernames": usernames},
+            headers={"X-User": admin_user},
+        )
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.error(
+            f"Invalidation du cache de l'API impossible pour "
+            f"{len(usernames)} utilisateurs : {e}"
+        )
+        return False
+    return True
+
+
+def load_checkpoint(path: str) -> int:
+    try:
+        with open(path) as f:
+            return int(json.load(f)["last_id"])
+    except FileNotFoundError:
+        return 0
+
+
+def save_checkpoint(path: str, report: RotationReport) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(asdict(report), f)
+    os.replace(tmp_path, path)
+
+
+async def rotate_keys(
+    batch_size: int = KEY_ROTATION_BATCH_SIZE,
+    max_rows_per_second: float = KEY_ROTATION_MAX_ROWS_PER_SECOND,
+    checkpoint: Optional[str] = KEY_ROTATION_CHECKPOINT,
+    restart: bool = False,
+    session_factory=None,
+    api_url: Optional[str] = KEY_ROTATION_API_URL,
+    admin_user: str = KEY_ROTATION_ADMIN_USER,
+) -> RotationReport:
+    """
+    Fait tourner les clés de tous les utilisateurs d'id supérieur au point
+    de reprise, à au plus `max_rows_per_second` lignes/s (0 : sans limite).
+    Les identités basculées sont invalidées dans ce processus et, si
+    `api_url` est renseignée, dans l'API via `admin_user`.
+    """
+    session_factory = session_factory or db_session.SessionLocal
+    report = RotationReport()
+    if checkpoint and not restart:
+        report.last_id = load_checkpoint(checkpoint)
+    logger.info(f"Rotation des clés à partir de l'id {report.last_id}")
+    query = (
+        select(*ROTATION_COLUMNS)
+        .outerjoin(UserSensitiveData, UserSensitiveData.user_id == User.id)
+        .where(User.id > report.last_id, User.encryption_key.is_not(None))
+        .order_by(User.id)
+        .execution_options(yield_per=batch_size)
+    )
+    started = time.perf_counter()
+    api_client = (
+        httpx.AsyncClient(base_url=api_url, timeout=10.0)
+        if api_url
+        else contextlib.nullcontext()
+    )
+    async with (
+        session_factory() as reader,
+        session_factory() as writer,
+        api_client as client,
+    ):
+        result = await reader.stream(query)
+        async for rows in result.partitions():
+            rotated, nb_undecryptable = rotate_rows(rows)
+            try:
+                switched = await apply_rotation(writer, rotated)
+                await writer.commit()
+            except Exception as e:
+                # Point de reprise laissé au dernier lot validé : le lot
+                # annulé est repris tel quel par la prochaine exécution
+                await writer.rollback()
+                report.error = (
+                    f"lot de l'id {rows[0].id} à {rows[-1].id} annulé : {e}"
+                )
+                logger.error(f"Rotation interrompue : {report.error}")
+                break
+            usernames = []
+            for r in rotated:
+                if r.user_id in switched:
+                    invalidate_fernet(r.old_key)
+                    user_identities.invalidate(r.username, "key_rotation")
+                    usernames.append(r.username)
+            if client is not None and usernames:
+                if not await notify_api(client, admin_user, usernames):
+                    report.unnotified += len(usernames)
+            report.last_id = rows[-1].id
+            report.scanned += len(rows)
+            report.rotated += len(switched)
+            report.undecryptable += nb_undecryptable
+            report.conflicts += len(rotated) - len(switched)
+            report.elapsed = time.perf_counter() - started
+            if checkpoint:
+                save_checkpoint(checkpoint, report)
+            logger.info(
+                f"Rotation : {report.scanned} lignes lues, {report.rotated} "
+                f"basculées, {report.rows_per_second:.0f} lignes/s"
+            )
+            if max_rows_per_second > 0:
+                # Bride le débit pour laisser la base au trafic en ligne
+                lag = report.scanned / max_rows_per_second - report.elapsed
+                if lag > 0:
+                    await asyncio.sleep(lag)
+    report.elapsed = time.perf_counter() - started
+    logger.info(f"Rotation des clés terminée : {asdict(report)}")
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Fait tourner les clés de chiffrement des utilisateurs."
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=KEY_ROTATION_BATCH_SIZE
+    )
+    parser.add_argument(
+        "--max-rows-per-second",
+        type=float,
+        default=KEY_ROTATION_MAX_ROWS_PER_SECOND,
+    )
+    parser.add_argument("--checkpoint", default=KEY_ROTATION_CHECKPOINT)
+    parser.add_argument(
+        "--restart", action="store_true", help="ignore le point de reprise"
+    )
+    parser.add_argument(
+        "--api-url",
+        default=KEY_ROTATION_API_URL,
+        help="API dont le cache d'identités est invalidé ('' : aucune)",
+    )
+    parser.add_argument("--admin-user", default=KEY_ROTATION_ADMIN_USER)
+    args = parser.parse_args()
+    report = asyncio.run(
+        rotate_keys(
+            args.batch_size,
+            args.max_rows_per_second,
+            args.checkpoint,
+            args.restart,
+            api_url=args.api_url,
+            admin_user=args.admin_user,
+        )
+    )
+    print(
+        json.dumps(
+            {
+                **asdict(report),
+                "rows_per_second": round(report.rows_per_second),
+            }
+        )
+    )
+    raise SystemExit(1 if report.error or report.unnotified else 0)
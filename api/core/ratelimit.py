@@ -0,0 +1,158 @@
+import math
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+from fastapi import HTTPException, Request, status
+from jose import JWTError
+from prometheus_client import Counter
+from api.core.hashing import password_hasher
+from api.core.tokens import decode_token
+from api.utils.logger import logger
+
+AUTH_RATE_PER_IP = float(os.getenv("AUTH_RATE_PER_IP", "5"))
+AUTH_BURST_PER_IP = float(os.getenv("AUTH_BURST_PER_IP", "20"))
+AUTH_RATE_PER_USER = float(os.getenv("AUTH_RATE_PER_USER", "1"))
+AUTH_BURST_PER_USER = float(os.getenv("AUTH_BURST_PER_USER", "5"))
+RATE_LIMIT_SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", "16"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+AUTH_ADMISSION = Counter(
+    "auth_admission_decisions_total",
+    "Décisions du contrôle d'admission des routes d'authentification",
+    ["route", "outcome"],
+)
+
+Bucket = List[float]  # [jetons disponibles, dernière mise à jour]
+
+
+class TokenBucketLimiter:
+    """
+    Limiteur à seaux de jetons, un seau par clé (IP, username...) : `rate`
+    jetons par seconde, au plus `burst` en réserve. Les seaux sont répartis
+    sur `shards` dictionnaires protégés chacun par leur propre verrou ;
+    chaque shard garde au plus `max_keys / shards` seaux (LRU).
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        shards: int = RATE_LIMIT_SHARDS,
+        max_keys: int = RATE_LIMIT_MAX_KEYS,
+    ):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._max_keys_per_shard = max(1, max_keys // max(1, shards))
+        self._shards: List[Tuple[threading.Lock, "OrderedDict[str, Bucket]"]]
+        self._shards = [
+            (threading.Lock(), OrderedDict()) for _ in range(max(1, shards))
+        ]
+
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        """Consomme `cost` jetons : 0 si accepté, sinon secondes d'attente."""
+        if self.rate <= 0:
+            return 0.0
+        lock, buckets = self._shards[
+            zlib.crc32(key.encode("utf-8")) % len(self._shards)
+        ]
+        now = time.monotonic()
+        with lock:
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = [self.burst, now]
+                if len(buckets) > self._max_keys_per_shard:
+                    buckets.popitem(last=False)
+            else:
+                buckets.move_to_end(key)
+                bucket[0] = min(
+                    self.burst, bucket[0] + (now - bucket[1]) * self.rate
+                )
+                bucket[1] = now
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return 0.0
+            return (cost - bucket[0]) / self.rate
+
+
+ip_limiter = TokenBucketLimiter(AUTH_RATE_PER_IP, AUTH_BURST_PER_IP)
+user_limiter = TokenBucketLimiter(AUTH_RATE_PER_USER, AUTH_BURST_PER_USER)
+
+
+async def _request_username(request: Request) -> Optional[str]:
+    """
+    Username visé : corps JSON (login, register) ou `sub` d'un bearer dont
+    la signature est valide. Un token forgé n'est limité que par son IP et
+    ne peut pas épuiser le seau de l'utilisateur qu'il prétend être.
+    """
+    if request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            body = await request.json()
+        except ValueError:
+            return None
+        if isinstance(body, dict) and isinstance(body.get("username"), str):
+            return body["username"]
+        return None
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        try:
+            claims = decode_token(authorization[7:].strip())
+        except JWTError:
+            return None
+        sub = claims.get("sub")
+        return sub if isinstance(sub, str) else None
+    return None
+
+
+def _reject(route: str, outcome: str, code: int, retry_after: float):
+    AUTH_ADMISSION.labels(route=route, outcome=outcome).inc()
+    logger.warning(f"Requête {route} refusée ({outcome})")
+    return HTTPException(
+        status_code=code,
+        detail=(
+            "Too many requests"
+            if code == status.HTTP_429_TOO_MANY_REQUESTS
+            else "Authentication service overloaded, retry later"
+        ),
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def auth_admission(
+    route: str, uses_hashing: bool = False
+) -> Callable[[Request], object]:
+    """
+    Dépendance FastAPI d'admission d'une route d'authentification : seaux
+    par IP puis par username (429), puis délestage (503) si le pool bcrypt
+    est déjà saturé, avant tout calcul coûteux.
+    """
+
+    async def dependency(request: Request) -> None:
+        client_ip = request.client.host if request.client else "inconnu"
+        retry_after = ip_limiter.acquire(client_ip)
+        if retry_after:
+            raise _reject(
+                route,
+                "limited_ip",
+                status.HTTP_429_TOO_MANY_REQUESTS,
+                retry_after,
+            )
+        username = await _request_username(request)
+        if username is not None:
+            retry_after = user_limiter.acquire(username)
+            if retry_after:
+                raise _reject(
+                    route,
+                    "limited_user",
+                    status.HTTP_429_TOO_MANY_REQUESTS,
+                    retry_after,
+                )
+        if uses_hashing and password_hasher.saturated:
+            raise _reject(
+                route, "shed", status.HTTP_503_SERVICE_UNAVAILABLE, 1.0
+            )
+        AUTH_ADMISSION.labels(route=route, outcome="allowed").inc()
+
+    return dependency
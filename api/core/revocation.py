@@ -0,0 +1,156 @@
+import asyncio
+import datetime
+import os
+import time
+from typing import Dict, Optional
+from prometheus_client import Counter, Gauge
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+import api.db.session as db_session
+from api.core.token_cache import token_cache
+from api.db.models import RevokedToken
+from api.utils.logger import logger
+
+REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL", "5"))
+REVOCATION_COMPACT_INTERVAL = float(
+    os.getenv("REVOCATION_COMPACT_INTERVAL", "3600")
+)
+
+REVOKED_TOKENS = Gauge(
+    "revoked_tokens_in_memory",
+    "Identifiants de tokens révoqués et non expirés connus du processus",
+)
+REVOCATION_CHECKS = Counter(
+    "token_revocation_checks_total",
+    "Contrôles de révocation de tokens",
+    ["result"],
+)
+
+
+def _utc(timestamp: float) -> datetime.datetime:
+    return datetime.datetime.utcfromtimestamp(timestamp)
+
+
+def _epoch(value: datetime.datetime) -> float:
+    return value.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+class RevocationStore:
+    """
+    Liste de révocation des tokens JWT, indexée par `jti`. Les révocations
+    sont persistées (table `revoked_tokens`, avec l'expiration du token) et
+    gardées dans un ensemble en mémoire : le contrôle fait sur chaque
+    requête ne touche jamais la base. Chaque processus relit les nouvelles
+    révocations toutes les `sync_interval` secondes, ce qui borne le délai
+    de propagation, et purge périodiquement les entrées expirées.
+    """
+
+    def __init__(
+        self,
+        sync_interval: float = REVOCATION_SYNC_INTERVAL,
+        compact_interval: float = REVOCATION_COMPACT_INTERVAL,
+    ):
+        self.sync_interval = sync_interval
+        self.compact_interval = compact_interval
+        self._revoked: Dict[str, float] = {}
+        self._watermark: Optional[datetime.datetime] = None
+        self._last_compaction = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        if not jti:
+            return False
+        revoked = jti in self._revoked
+        REVOCATION_CHECKS.labels(
+            result="revoked" if revoked else "valid"
+        ).inc()
+        return revoked
+
+    async def revoke(
+        self,
+        db: AsyncSession,
+        jti: str,
+        expires_at: float,
+        username: Optional[str] = None,
+    ) -> None:
+        """Révoque un token jusqu'à son expiration, ici puis via la base."""
+        await db.merge(
+            RevokedToken(
+                jti=jti, username=username, expires_at=_utc(expires_at)
+            )
+        )
+        await db.commit()
+        self._add(jti, expires_at)
+        logger.info(f"Token {jti} révoqué (utilisateur {username})")
+
+    async def sync(self) -> int:
+        """Charge les révocations faites depuis la dernière synchronisation."""
+        now = datetime.datetime.utcnow()
+        query = select(RevokedToken.jti, RevokedToken.expires_at).where(
+            RevokedToken.expires_at > now
+        )
+        if self._watermark is not None:
+            # Recouvrement d'un intervalle : tolère les écarts d'horloge
+            since = self._watermark - datetime.timedelta(
+                seconds=self.sync_interval
+            )
+            query = query.where(RevokedToken.revoked_at >= since)
+        async with db_session.SessionLocal() as session:
+            rows = (await session.execute(query)).all()
+        for jti, expires_at in rows:
+            self._add(jti, _epoch(expires_at))
+        self._watermark = now
+        return len(rows)
+
+    async def compact(self) -> int:
+        """Supprime les révocations de tokens déjà expirés."""
+        now = time.time()
+        for jti in [j for j, exp in self._revoked.items() if exp <= now]:
+            del self._revoked[jti]
+        REVOKED_TOKENS.set(len(self._revoked))
+        async with db_session.SessionLocal() as session:
+            result = await session.execute(
+                delete(RevokedToken).where(
+                    RevokedToken.expires_at <= _utc(now)
+                )
+            )
+            await session.commit()
+        self._last_compaction = time.monotonic()
+        if result.rowcount:
+            logger.info(f"{result.rowcount} révocations expirées purgées")
+        return result.rowcount
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sync()
+                elapsed = time.monotonic() - self._last_compaction
+                if elapsed >= self.compact_interval:
+                    await self.compact()
+            except Exception as e:
+                logger.warning(f"Synchronisation des révocations : {e}")
+            await asyncio.sleep(self.sync_interval)
+
+    def _add(self, jti: str, expires_at: float) -> None:
+        if jti not in self._revoked:
+            token_cache.evict_jti(jti)
+        self._revoked[jti] = expires_at
+        REVOKED_TOKENS.set(len(self._revoked))
+
+
+revocations = RevocationStore()
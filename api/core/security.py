@@ -2,6 +2,8 @@ import os
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, SecurityScopes
 from jose import jwt, JWTError
+from api.core.revocation import revocations
+from api.core.token_cache import VerifiedToken, token_cache
 from api.utils.logger import logger
 
 SECRET_KEY = os.getenv("SECRET_KEY", "mon_secret_default")
@@ -22,7 +24,8 @@ def get_current_user_with_scopes(
 ):
     """
     Décode et valide le token JWT pour s'assurer que l'utilisateur possède
-    les scopes requis pour accéder à l'endpoint protégé.
+    les scopes requis pour accéder à l'endpoint protégé. Un token déjà
+    vérifié est servi par le cache jusqu'à son expiration.
     Renvoie un dictionnaire contenant le nom d'utilisateur et les scopes.
     """
     if not token:
@@ -32,29 +35,33 @@ def get_current_user_with_scopes(
             detail="Not authenticated",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    verified = token_cache.get(token)
+    if verified is None:
+        verified = verify_token(token)
+        token_cache.put(token, verified)
+    if revocations.is_revoked(verified.jti):
+        logger.warning(f"Token révoqué présenté par {verified.username}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    # Vérification que tous les scopes requis sont présents
+    scope = verified.missing_scope(tuple(security_scopes.scopes))
+    if scope is not None:
+        logger.warning(f"Permission insuffisante : scope manquant {scope}")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Insufficient permissions. Missing scope: {scope}",
+            headers={"WWW-Authenticate": f'Bearer scope="{scope}"'},
+        )
+    return {"username": verified.username, "scopes": list(verified.scopes)}
+
+
+def verify_token(token: str) -> VerifiedToken:
+    """Décode et vérifie la signature du token JWT, puis extrait ses claims."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        token_scopes = payload.get("scopes", [])
-        if username is None:
-            logger.warning("Token JWT sans username")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token payload",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        # Vérification que tous les scopes requis sont présents
-        for scope in security_scopes.scopes:
-            if scope not in token_scopes:
-                logger.warning(
-                    f"Permission insuffisante : scope manquant {scope}"
-                )
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail=f"Insufficient permissions. Missing scope: {scope}",
-                    headers={"WWW-Authenticate": f'Bearer scope="{scope}"'},
-                )
-        return {"username": username, "scopes": token_scopes}
     except JWTError:
         logger.warning("Échec de validation du token JWT")
         raise HTTPException(
@@ -62,3 +69,20 @@ def get_current_user_with_scopes(
             detail="Could not validate token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    username: str = payload.get("sub")
+    if username is None:
+        logger.warning("Token JWT sans username")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token payload",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    scopes = tuple(payload.get("scopes", []))
+    return VerifiedToken(
+        username=username,
+        scopes=scopes,
+        scope_set=frozenset(scopes),
+        jti=payload.get("jti"),
+        # Sans `exp`, le token est vérifié à chaque requête
+        expires_at=float(payload.get("exp", 0)),
+    )
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Set, Tuple
+from prometheus_client import Counter, Gauge
+
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+
+TOKEN_CACHE_HITS = Counter(
+    "token_cache_hits_total",
+    "Tokens JWT servis depuis le cache de tokens vérifiés",
+)
+TOKEN_CACHE_MISSES = Counter(
+    "token_cache_misses_total",
+    "Tokens JWT décodés et vérifiés faute d'entrée en cache",
+)
+TOKEN_CACHE_EVICTIONS = Counter(
+    "token_cache_evictions_total",
+    "Entrées retirées du cache de tokens vérifiés",
+    ["reason"],
+)
+TOKEN_CACHE_ENTRIES = Gauge(
+    "token_cache_entries",
+    "Nombre de tokens vérifiés actuellement en cache",
+)
+
+
+@dataclass(frozen=True)
+class VerifiedToken:
+    username: str
+    scopes: Tuple[str, ...]
+    scope_set: FrozenSet[str]
+    jti: Optional[str]
+    expires_at: float
+
+    def missing_scope(self, required: Tuple[str, ...]) -> Optional[str]:
+        """Premier scope requis absent du token, None s'ils y sont tous."""
+        if self.scope_set.issuperset(required):
+            return None
+        return next(s for s in required if s not in self.scope_set)
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class VerifiedTokenCache:
+    """
+    Cache LRU borné des claims de tokens JWT déjà vérifiés, indexé par
+    l'empreinte SHA-256 du token (le token brut n'est pas conservé). Une
+    entrée vit jusqu'à l'expiration (`exp`) du token ; `evict_jti` et
+    `evict_user` la retirent plus tôt, lors d'une révocation.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX_ENTRIES):
+        self.max_entries = max(0, max_entries)
+        self._entries: "OrderedDict[str, VerifiedToken]" = OrderedDict()
+        self._by_jti: Dict[str, str] = {}
+        self._by_user: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[VerifiedToken]:
+        digest = token_digest(token)
+        with self._lock:
+            verified = self._entries.get(digest)
+            if verified is not None and verified.expires_at <= time.time():
+                self._remove(digest, "expired")
+                verified = None
+            if verified is None:
+                TOKEN_CACHE_MISSES.inc()
+                return None
+            self._entries.move_to_end(digest)
+        TOKEN_CACHE_HITS.inc()
+        return verified
+
+    def put(self, token: str, verified: VerifiedToken) -> None:
+        if not self.max_entries or verified.expires_at <= time.time():
+            return
+        digest = token_digest(token)
+        with self._lock:
+            self._remove(digest, "replaced")
+            self._entries[digest] = verified
+            if verified.jti:
+                self._by_jti[verified.jti] = digest
+            self._by_user.setdefault(verified.username, set()).add(digest)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)), "capacity")
+            TOKEN_CACHE_ENTRIES.set(len(self._entries))
+
+    def evict_jti(self, jti: str) -> None:
+        """Retire le token d'identifiant `jti` (token révoqué)."""
+        with self._lock:
+            digest = self._by_jti.get(jti)
+            if digest is not None:
+                self._remove(digest, "revoked")
+
+    def evict_user(self, username: str) -> None:
+        """Retire tous les tokens d'un utilisateur (déconnexion, rôle...)."""
+        with self._lock:
+            for digest in list(self._by_user.get(username, ())):
+                self._remove(digest, "revoked")
+
+    def clear(self) -> None:
+        with self._lock:
+            for digest in list(self._entries):
+                self._remove(digest, "purged")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, digest: str, reason: str) -> None:
+        verified = self._entries.pop(digest, None)
+        if verified is None:
+            return
+        if verified.jti and self._by_jti.get(verified.jti) == digest:
+            del self._by_jti[verified.jti]
+        user_digests = self._by_user.get(verified.username)
+        if user_digests is not None:
+            user_digests.discard(digest)
+            if not user_digests:
+                del self._by_user[verified.username]
+        TOKEN_CACHE_EVICTIONS.labels(reason=reason).inc()
+        TOKEN_CACHE_ENTRIES.set(len(self._entries))
+
+
+token_cache = VerifiedTokenCache()
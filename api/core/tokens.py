@@ -2,6 +2,7 @@ import os
 from datetime import datetime, timedelta, timezone
 from jose import jwt
 import uuid
+from api.core.token_cache import token_digest
 from api.utils.logger import logger
 
 SECRET_KEY = os.getenv("SECRET_KEY", "mon_secret_default")
@@ -26,3 +27,13 @@ def create_access_token(data: dict, expires_delta: timedelta):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     logger.debug(f"Access token généré pour {data.get('sub')}")
     return encoded_jwt
+
+
+def decode_token(token: str) -> dict:
+    """Vérifie la signature et l'expiration du token (lève JWTError)."""
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+
+def hash_refresh_token(token: str) -> str:
+    """Empreinte stockée en base à la place du refresh token."""
+    return token_digest(token.strip())
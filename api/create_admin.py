@@ -1,3 +1,4 @@
+import asyncio
 import os
 from getpass import getpass
 from api.db.session import SessionLocal
@@ -12,6 +13,18 @@ ADMIN_CREATION_SECRET = os.getenv("ADMIN_CREATION_SECRET")
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 
+async def create_admin(username: str, email: str, password: str):
+    async with SessionLocal() as db:
+        return await create_user(
+            db,
+            username,
+            email,
+            password,
+            role="admin",
+            encryption_key=generate_user_key(),
+        )
+
+
 def main():
     admin_secret = os.getenv("ADMIN_CREATION_SECRET")
     if not admin_secret:
@@ -36,17 +49,8 @@ def main():
         logger.warning("Les mots de passe ne correspondent pas.")
         return
 
-    db = SessionLocal()
-    encryption_key = generate_user_key()
     try:
-        admin_user = create_user(
-            db,
-            username,
-            email,
-            password,
-            role="admin",
-            encryption_key=encryption_key,
-        )
+        admin_user = asyncio.run(create_admin(username, email, password))
         logger.info(
             f"Compte administrateur créé avec succès : username='{admin_user.username}', id={admin_user.id}"
         )
@@ -56,8 +60,6 @@ def main():
     except Exception as e:
         logger.exception("Erreur lors de la création du compte administrateur")
         print("Erreur lors de la création du compte administrateur :", e)
-    finally:
-        db.close()
 
 
 if __name__ == "__main__":
@@ -1,9 +1,23 @@
 import asyncio
+from sqlalchemy import text
 from api.db.models import Base
 from api.db.session import async_engine
 from api.utils.logger import logger
 
 
+# Évolutions de schéma idempotentes pour les bases créées avant l'ajout
+# d'une colonne (create_all ne modifie pas une table existante)
+SCHEMA_UPGRADES = [
+    "ALTER TABLE user_sensitive_data "
+    "ADD COLUMN IF NOT EXISTS refresh_token_hash VARCHAR(64)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS "
+    "ix_user_sensitive_data_refresh_token_hash "
+    "ON user_sensitive_data (refresh_token_hash)",
+    "CREATE INDEX IF NOT EXISTS ix_users_created_at ON users (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_users_role_id ON users (role, id)",
+]
+
+
 async def init_db(max_retries: int = 30, delay: float = 2.0) -> None:
     """
     Crée toutes les tables en début d'application, via engine async.
@@ -14,6 +28,8 @@ async def init_db(max_retries: int = 30, delay: float = 2.0) -> None:
         try:
             async with async_engine.begin() as conn:
                 await conn.run_sync(Base.metadata.create_all)
+                for statement in SCHEMA_UPGRADES:
+                    await conn.execute(text(statement))
                 logger.info("Base de données initialisée (tables créées)")
                 return
         except Exception as e:
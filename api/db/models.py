@@ -1,5 +1,5 @@
 import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -15,7 +15,7 @@ class User(Base):
     role = Column(String, default="user", nullable=False)
     refresh_token = Column(String, nullable=True)
     bio = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
     updated_at = Column(
         DateTime,
         default=datetime.datetime.utcnow,
@@ -25,6 +25,8 @@ class User(Base):
     sensitive_data = relationship(
         "UserSensitiveData", back_populates="user", uselist=False
     )
+    # Pagination par curseur sur id, filtrée par rôle (/admin/users)
+    __table_args__ = (Index("ix_users_role_id", "role", "id"),)
 
 
 class UserSensitiveData(Base):
@@ -33,4 +35,18 @@ class UserSensitiveData(Base):
     user_id = Column(Integer, ForeignKey("users.id"), unique=True)
     encrypted_bio = Column(String)
     encrypted_refresh_token = Column(String, nullable=True)
+    # Empreinte SHA-256 du refresh token courant (rotation par CAS)
+    refresh_token_hash = Column(
+        String(64), nullable=True, unique=True, index=True
+    )
     user = relationship("User", back_populates="sensitive_data")
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    jti = Column(String(64), primary_key=True)
+    username = Column(String, nullable=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(
+        DateTime, default=datetime.datetime.utcnow, nullable=False, index=True
+    )
@@ -0,0 +1,225 @@
+import os
+import time
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+from pydantic import ValidationError
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from api.core.crypto import encrypt_many, generate_user_keys
+from api.core.hashing import (
+    PasswordHasher,
+    PasswordHashingUnavailable,
+    password_hasher,
+)
+from api.db.models import User, UserSensitiveData
+from api.db.schemas import BulkImportFailure, BulkImportResult, UserImport
+from api.utils.logger import logger
+
+PROVISIONING_BATCH_SIZE = int(os.getenv("PROVISIONING_BATCH_SIZE", "500"))
+PROVISIONING_MAX_ROWS = int(os.getenv("PROVISIONING_MAX_ROWS", "10000"))
+PROVISIONING_HASH_EXECUTOR = os.getenv("PROVISIONING_HASH_EXECUTOR", "process")
+PROVISIONING_HASH_WORKERS = int(
+    os.getenv("PROVISIONING_HASH_WORKERS", str(os.cpu_count() or 2))
+)
+PROVISIONING_HASH_TIMEOUT = float(
+    os.getenv("PROVISIONING_HASH_TIMEOUT", "300")
+)
+
+HASHING_UNAVAILABLE_ERROR = (
+    "Hachage indisponible : ligne non traitée, à soumettre de nouveau."
+)
+
+# Pool distinct de celui des logins : un import ne les prive pas de CPU
+# plus que PROVISIONING_HASH_WORKERS et n'est pas soumis à leur délai
+provisioning_hasher = PasswordHasher(
+    mode=PROVISIONING_HASH_EXECUTOR,
+    max_workers=PROVISIONING_HASH_WORKERS,
+    max_pending=PROVISIONING_HASH_WORKERS,
+    timeout=PROVISIONING_HASH_TIMEOUT,
+)
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in e['loc'])}: {e['msg']}"
+        for e in error.errors()
+    )
+
+
+def _reported_username(record: Mapping[str, Any]) -> Optional[str]:
+    # Ligne brute : le username peut être d'un autre type qu'une chaîne
+    username = record.get("username")
+    return None if username is None else str(username)
+
+
+async def provision_users(
+    db: AsyncSession,
+    records: Sequence[Mapping[str, Any]],
+    batch_size: int = PROVISIONING_BATCH_SIZE,
+) -> BulkImportResult:
+    """
+    Crée des utilisateurs en masse, par lots de `batch_size` validés
+    chacun dans leur transaction. Une ligne invalide ou déjà prise est
+    rapportée dans `failed` (numéro de ligne à partir de 0) sans bloquer
+    les autres. Si le pool de hachage devient indisponible, l'import
+    s'arrête : PasswordHashingUnavailable est levée si rien n'a été créé,
+    sinon les lignes non traitées sont rapportées dans `failed`.
+    """
+    started = time.perf_counter()
+    failures: List[BulkImportFailure] = []
+    created = 0
+    for start in range(0, len(records), batch_size):
+        batch = []
+        for index, record in enumerate(
+            records[start : start + batch_size], start
+        ):
+            try:
+                batch.append((index, UserImport.model_validate(record)))
+            except ValidationError as e:
+                failures.append(
+                    BulkImportFailure(
+                        row=index,
+                        username=_reported_username(record),
+                        error=_validation_message(e),
+                    )
+                )
+        try:
+            created += await _provision_batch(db, batch, failures)
+        except PasswordHashingUnavailable as e:
+            if not created:
+                raise
+            # Lots précédents déjà validés : l'appelant doit savoir
+            # précisément quelles lignes resoumettre
+            logger.warning(
+                f"Provisionnement interrompu à la ligne {start} : {e}"
+            )
+            reported = {failure.row for failure in failures}
+            failures.extend(
+                BulkImportFailure(
+                    row=index,
+                    username=_reported_username(record),
+                    error=HASHING_UNAVAILABLE_ERROR,
+                )
+                for index, record in enumerate(records[start:], start)
+                if index not in reported
+            )
+            break
+    duration = time.perf_counter() - started
+    rows_per_second = len(records) / duration if duration > 0 else 0.0
+    failures.sort(key=lambda failure: failure.row)
+    logger.info(
+        f"Provisionnement : {created} utilisateurs créés, {len(failures)} "
+        f"échecs en {duration:.2f}s ({rows_per_second:.0f} lignes/s)"
+    )
+    return BulkImportResult(
+        created=created,
+        failed=failures,
+        duration_seconds=round(duration, 3),
+        rows_per_second=round(rows_per_second, 1),
+    )
+
+
+async def _provision_batch(
+    db: AsyncSession,
+    batch: List[Tuple[int, UserImport]],
+    failures: List[BulkImportFailure],
+) -> int:
+    if not batch:
+        return 0
+    # Unicité vérifiée en une requête pour le lot, doublons internes compris
+    existing = await db.execute(
+        select(User.username, User.email).where(
+            or_(
+                User.username.in_([user.username for _, user in batch]),
+                User.email.in_([user.email for _, user in batch]),
+            )
+        )
+    )
+    taken_usernames, taken_emails = set(), set()
+    for username, email in existing:
+        taken_usernames.add(username)
+        taken_emails.add(email)
+    accepted = []
+    for index, user in batch:
+        if user.username in taken_usernames:
+            error = f"Le nom d'utilisateur '{user.username}' existe déjà."
+        elif user.email in taken_emails:
+            error = f"L'email '{user.email}' existe déjà."
+        else:
+            taken_usernames.add(user.username)
+            taken_emails.add(user.email)
+            accepted.append((index, user))
+            continue
+        failures.append(
+            BulkImportFailure(row=index, username=user.username, error=error)
+        )
+    if not accepted:
+        return 0
+
+    provisioning_hasher.rounds = password_hasher.rounds
+    hashes = await provisioning_hasher.hash_many(
+        [user.password for _, user in accepted]
+    )
+    keys = generate_user_keys(len(accepted))
+    bios = encrypt_many(
+        (user.bio or "", key) for (_, user), key in zip(accepted, keys)
+    )
+    rows = [
+        (
+            index,
+            {
+                "username": user.username,
+                "email": user.email,
+                "hashed_password": hashed,
+                "role": user.role,
+                "encryption_key": key,
+            },
+            bio,
+        )
+        for (index, user), hashed, key, bio in zip(
+            accepted, hashes, keys, bios
+        )
+    ]
+    try:
+        created = await _insert_rows(db, rows)
+        await db.commit()
+        return created
+    except IntegrityError:
+        # Conflit avec une écriture concurrente : ligne par ligne, chacune
+        # dans son point de sauvegarde
+        await db.rollback()
+    created = 0
+    for row in rows:
+        try:
+            async with db.begin_nested():
+                created += await _insert_rows(db, [row])
+        except IntegrityError:
+            failures.append(
+                BulkImportFailure(
+                    row=row[0],
+                    username=row[1]["username"],
+                    error="Nom d'utilisateur ou email déjà utilisé.",
+                )
+            )
+    await db.commit()
+    return created
+
+
+async def _insert_rows(
+    db: AsyncSession, rows: List[Tuple[int, Dict[str, Any], str]]
+) -> int:
+    """Deux INSERT multi-lignes : utilisateurs puis bios chiffrées."""
+    result = await db.execute(
+        insert(User).returning(User.id, User.username),
+        [values for _, values, _ in rows],
+    )
+    ids = {username: user_id for user_id, username in result}
+    await db.execute(
+        insert(UserSensitiveData),
+        [
+            {"user_id": ids[values["username"]], "encrypted_bio": bio}
+            for _, values, bio in rows
+        ],
+    )
+    return len(rows)
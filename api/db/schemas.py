@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 
 class UserBase(BaseModel):
@@ -21,3 +21,29 @@ class UserOut(UserBase):
 class UserLogin(BaseModel):
     username: str
     password: str
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+
+class UserImport(UserCreate):
+    role: str = Field("user", pattern="^(user|admin)$")
+
+
+class BulkUserImport(BaseModel):
+    # Lignes validées une à une : une ligne invalide n'échoue qu'elle-même
+    users: List[Dict[str, Any]] = Field(..., min_length=1)
+
+
+class BulkImportFailure(BaseModel):
+    row: int
+    username: Optional[str] = None
+    error: str
+
+
+class BulkImportResult(BaseModel):
+    created: int
+    failed: List[BulkImportFailure]
+    duration_seconds: float
+    rows_per_second: float
@@ -1,24 +1,26 @@
 from typing import Optional
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
-from api.db.models import User
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
+from api.db.models import User, UserSensitiveData
 from api.core.crypto import generate_user_key
-import bcrypt
+from api.core.hashing import PasswordHashingUnavailable, password_hasher
 from api.utils.logger import logger
 
+CREDENTIAL_COLUMNS = (User.id, User.username, User.role, User.hashed_password)
 
-def get_password_hash(password: str) -> str:
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode("utf-8"), salt)
+
+async def get_password_hash(password: str) -> str:
+    hashed = await password_hasher.hash(password)
     logger.debug("Mot de passe hashé")
-    return hashed.decode("utf-8")
+    return hashed
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    result = bcrypt.checkpw(
-        plain_password.encode("utf-8"), hashed_password.encode("utf-8")
-    )
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    result = await password_hasher.verify(plain_password, hashed_password)
     logger.debug(
         f"Vérification du mot de passe : {'succès' if result else 'échec'}"
     )
@@ -71,7 +73,7 @@ async def create_user(
             f"Échec création utilisateur : email '{email}' déjà utilisé"
         )
         raise ValueError(f"L'email '{email}' existe déjà.")
-    hashed_password = get_password_hash(password)
+    hashed_password = await get_password_hash(password)
     key = encryption_key or generate_user_key()
     user = User(
         username=username,
@@ -87,12 +89,77 @@ async def create_user(
     return user
 
 
+async def get_user_credentials(
+    db: AsyncSession, username: str
+) -> Optional[Row]:
+    """Seules colonnes utiles à l'authentification, en une requête."""
+    result = await db.execute(
+        select(*CREDENTIAL_COLUMNS).where(User.username == username)
+    )
+    return result.first()
+
+
 async def authenticate_user(
     db: AsyncSession, username: str, password: str
-) -> Optional[User]:
-    user = await get_user_by_username(db, username)
-    if not user or not verify_password(password, user.hashed_password):
+) -> Optional[Row]:
+    """
+    Vérifie les identifiants et renvoie (id, username, role,
+    hashed_password) de l'utilisateur, ou None.
+    """
+    user = await get_user_credentials(db, username)
+    if not user or not await verify_password(password, user.hashed_password):
         logger.warning(f"Échec d'authentification pour '{username}'")
         return None
     logger.info(f"Authentification réussie pour '{username}'")
+    if password_hasher.needs_rehash(user.hashed_password):
+        await rehash_password(db, user, password)
     return user
+
+
+async def rehash_password(db: AsyncSession, user: Row, password: str) -> None:
+    """
+    Recalcule au coût bcrypt courant le hash d'un utilisateur qui vient de
+    s'authentifier. La mise à jour est conditionnelle à l'ancien hash et un
+    échec n'empêche pas la connexion.
+    """
+    try:
+        new_hash = await get_password_hash(password)
+    except PasswordHashingUnavailable:
+        logger.warning(f"Rehash reporté pour '{user.username}' (pool saturé)")
+        return
+    await db.execute(
+        update(User)
+        .where(
+            User.id == user.id,
+            User.hashed_password == user.hashed_password,
+        )
+        .values(hashed_password=new_hash)
+    )
+    logger.info(
+        f"Mot de passe de '{user.username}' rehashé au coût "
+        f"{password_hasher.rounds}"
+    )
+
+
+async def store_refresh_token(
+    db: AsyncSession, user_id: int, refresh_token_hash: str
+) -> None:
+    """
+    Enregistre l'empreinte du refresh token courant en un seul aller-retour
+    (INSERT ... ON CONFLICT (user_id) DO UPDATE), que la ligne
+    `user_sensitive_data` existe déjà ou non.
+    """
+    statement = pg_insert(UserSensitiveData).values(
+        user_id=user_id,
+        encrypted_bio="",
+        refresh_token_hash=refresh_token_hash,
+    )
+    await db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[UserSensitiveData.user_id],
+            set_={
+                "refresh_token_hash": statement.excluded.refresh_token_hash,
+                "encrypted_refresh_token": None,
+            },
+        )
+    )
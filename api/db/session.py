@@ -1,8 +1,13 @@
 import os
 import ssl
+import time
+from typing import Any, AsyncGenerator, Dict
+from prometheus_client import Counter, Gauge, Histogram
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy import event, text
 from dotenv import load_dotenv
 from api.utils.logger import logger
 
@@ -24,6 +29,81 @@ ASYNC_DATABASE_URL = DATABASE_URL.replace(
     "postgresql://", "postgresql+asyncpg://"
 )
 
+# Profils du moteur : dev journalise chaque requête SQL, prod et bench
+# dimensionnent le pool et le cache de requêtes préparées d'asyncpg
+DB_PROFILES: Dict[str, Dict[str, Any]] = {
+    "dev": {
+        "echo": True,
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30.0,
+        "pool_recycle": -1,
+        "pool_pre_ping": True,
+        "statement_cache_size": 100,
+    },
+    "prod": {
+        "echo": False,
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_timeout": 10.0,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "statement_cache_size": 500,
+    },
+    "bench": {
+        "echo": False,
+        "pool_size": 20,
+        "max_overflow": 0,
+        "pool_timeout": 5.0,
+        "pool_recycle": -1,
+        "pool_pre_ping": False,
+        "statement_cache_size": 1000,
+    },
+}
+
+DB_PROFILE = os.getenv("DB_PROFILE", "prod")
+if DB_PROFILE not in DB_PROFILES:
+    logger.error(f"DB_PROFILE inconnu : {DB_PROFILE}")
+    raise RuntimeError(
+        f"DB_PROFILE doit valoir l'un de : {', '.join(DB_PROFILES)}"
+    )
+
+# Chaque réglage du profil peut être surchargé par DB_<NOM> (DB_POOL_SIZE...)
+engine_settings = dict(DB_PROFILES[DB_PROFILE])
+for name, default in engine_settings.items():
+    value = os.getenv(f"DB_{name.upper()}")
+    if value is not None:
+        engine_settings[name] = (
+            value.lower() in ("1", "true", "yes")
+            if isinstance(default, bool)
+            else type(default)(value)
+        )
+
+DB_POOL_CHECKOUT = Histogram(
+    "db_pool_checkout_seconds",
+    "Temps d'obtention d'une connexion du pool (attente comprise)",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Connexions non obtenues du pool avant pool_timeout",
+)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Pool asyncio standard qui mesure l'attente de chaque connexion."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT.observe(time.perf_counter() - started)
+
+
 # Création du contexte SSL pour asyncpg
 ssl_context = ssl.create_default_context()
 ssl_context.check_hostname = False
@@ -31,16 +111,89 @@ ssl_context.verify_mode = ssl.CERT_NONE
 
 async_engine = create_async_engine(
     ASYNC_DATABASE_URL,
-    echo=True,
-    pool_pre_ping=True,
-    connect_args={"ssl": ssl_context},
+    echo=engine_settings["echo"],
+    poolclass=InstrumentedQueuePool,
+    pool_size=engine_settings["pool_size"],
+    max_overflow=engine_settings["max_overflow"],
+    pool_timeout=engine_settings["pool_timeout"],
+    pool_recycle=engine_settings["pool_recycle"],
+    pool_pre_ping=engine_settings["pool_pre_ping"],
+    connect_args={
+        "ssl": ssl_context,
+        "prepared_statement_cache_size": engine_settings[
+            "statement_cache_size"
+        ],
+    },
+)
+logger.info(f"Moteur de base de données : profil {DB_PROFILE}")
+
+# Lus à chaque collecte Prometheus, sans coût sur le chemin des requêtes
+DB_POOL_SIZE = Gauge("db_pool_size", "Taille nominale du pool de connexions")
+DB_POOL_SIZE.set_function(lambda: async_engine.pool.size())
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connexions du pool actuellement empruntées"
 )
+DB_POOL_CHECKED_OUT.set_function(lambda: async_engine.pool.checkedout())
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connexions ouvertes au-delà de pool_size (négatif : places libres)",
+)
+DB_POOL_OVERFLOW.set_function(lambda: async_engine.pool.overflow())
 
 SessionLocal = sessionmaker(
     bind=async_engine, class_=AsyncSession, expire_on_commit=False
 )
 
 
+# Une session a écrit si elle a flushé des objets ou exécuté un
+# INSERT/UPDATE/DELETE depuis son dernier commit ou rollback
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement(orm_execute_state) -> None:
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["writes"] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context) -> None:
+    session.info["writes"] = True
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _reset_writes(session) -> None:
+    session.info.pop("writes", None)
+
+
+def has_pending_writes(session: AsyncSession) -> bool:
+    return session.in_transaction() and bool(
+        session.info.get("writes")
+        or session.new
+        or session.dirty
+        or session.deleted
+    )
+
+
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session de base de données d'une requête, à déclarer avec
+    `Depends(get_db, scope="function")` : elle est fermée dès la fin de la
+    route, avant l'envoi de la réponse. La connexion n'est prise au pool
+    qu'à la première requête SQL. Les écritures que la route n'a pas
+    validées sont commitées ; sinon la transaction ouverte par les lectures
+    est annulée à la fermeture (ROLLBACK), qui coûte le même aller-retour
+    qu'un COMMIT.
+    """
+    async with SessionLocal() as session:
+        try:
+            yield session
+            if has_pending_writes(session):
+                await session.commit()
+        except Exception:
+            await session.rollback()
+            logger.exception("Erreur lors de la gestion de la session DB")
+            raise
+
+
 async def connect_to_db() -> None:
     """
     Utilisé par test_co_db.py pour vérifier qu'on peut pinger la base.
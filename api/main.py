@@ -1,9 +1,11 @@
+import asyncio
 import os
 from fastapi import FastAPI, HTTPException, status, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from contextlib import asynccontextmanager
-from typing import List
-from pydantic import BaseModel
+from typing import List, Optional, Sequence, Tuple, Type
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
 import uvicorn
 
 # Routers métier
@@ -13,22 +15,73 @@ from api.admin.routes import router as admin_router
 from api.auth.routes import router as auth_router
 
 # Services transversaux
+from api.core.hashing import BCRYPT_CALIBRATE, password_hasher
+from api.db.provisioning import provisioning_hasher
+from api.core.revocation import revocations
 from api.utils.logger import logger
 from api.notify_discord import notify_discord
+from api.ml.batcher import batcher
+from api.ml.bulk import RequestStreamingResponse, detect_format, score_stream
+from api.ml.executor import executor
+from api.ml.cache import prompt_cache
+from api.ml.generation import GENERATION_MODEL_VERSION, generate_text
+from api.ml.jobs import retrain_jobs
+from api.ml.payloads import (
+    ARROW_MEDIA_TYPE,
+    RAW_MEDIA_TYPE,
+    PayloadError,
+    decode_vectors,
+    encode_predictions,
+    request_format,
+    response_format,
+)
+from api.ml.streaming import negotiate_stream_format, stream_generation
+from api.ml.tracking import MLFLOW_TRACKING_URI, tracker
+from api.ml.registry import MODEL_NAME, MODEL_SOURCE, MODEL_VERSION, registry
 import mlflow
 from prometheus_fastapi_instrumentator import Instrumentator
 
 # --- Configuration MLflow ---
-MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://mlflow:5000")
 mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
 
+# --- Configuration de l'inférence ---
+PREDICT_BATCH_MAX_ITEMS = int(os.getenv("PREDICT_BATCH_MAX_ITEMS", "10000"))
+
 
 # --- Cycle de vie de l'application ---
+async def load_initial_model() -> None:
+    """
+    Charge le modèle configuré en arrière-plan : le modèle intégré répond
+    aux requêtes jusqu'à ce que le nouveau soit préchauffé et publié.
+    """
+    try:
+        await registry.activate(MODEL_NAME, MODEL_VERSION, MODEL_SOURCE)
+    except Exception as e:
+        logger.error(f"Échec du chargement du modèle {MODEL_NAME} : {e}")
+        notify_discord(f"Échec chargement modèle : {str(e)}", status="Erreur")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("🚀 L'API FastAPI démarre (startup event)")
     notify_discord("🚀 L'API FastAPI vient de démarrer !", status="Démarrage")
+    tracker.start()
+    executor.start()
+    password_hasher.start()
+    if BCRYPT_CALIBRATE:
+        await password_hasher.calibrate()
+    revocations.start()
+    batcher.start()
+    if MODEL_NAME:
+        app.state.model_loading = asyncio.create_task(load_initial_model())
     yield
+    await batcher.stop()
+    await revocations.stop()
+    await retrain_jobs.shutdown()
+    executor.shutdown()
+    password_hasher.shutdown()
+    provisioning_hasher.shutdown()
+    await asyncio.to_thread(tracker.stop)
 
 
 # --- Création de l'app FastAPI ---
@@ -73,6 +126,19 @@ class PredictResponse(BaseModel):
     prediction: float
 
 
+class PredictBatchRequest(BaseModel):
+    data: List[List[float]]
+
+
+class PredictBatchItem(BaseModel):
+    prediction: Optional[float] = None
+    error: Optional[str] = None
+
+
+class PredictBatchResponse(BaseModel):
+    predictions: List[PredictBatchItem]
+
+
 class GenerateRequest(BaseModel):
     prompt: str
 
@@ -84,18 +150,76 @@ class GenerateResponse(BaseModel):
 # --- Endpoints IA ---
 
 
-@app.post("/predict", response_model=PredictResponse, tags=["IA"])
-async def predict(request: PredictRequest):
-    logger.info(f"Appel endpoint /predict avec data={request.data}")
+async def read_predict_body(
+    http_request: Request, model: Type[BaseModel]
+) -> Tuple[List[Sequence[float]], str]:
+    """
+    Lit le corps d'une requête de prédiction : JSON validé par `model`, ou
+    format binaire (Arrow IPC, tampon de flottants brut) décodé sans copie.
+    Renvoie les vecteurs et le format de la requête.
+    """
+    content_type = http_request.headers.get("content-type", "")
+    fmt = request_format(content_type)
+    body = await http_request.body()
+    if fmt != "json":
+        try:
+            return decode_vectors(body, content_type), fmt
+        except PayloadError as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Erreur lors de la prédiction : {str(e)}",
+            )
+    try:
+        data = model.model_validate_json(body).data
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in e.errors()]
+        )
+    return (data if model is PredictBatchRequest else [data]), fmt
+
+
+def predict_openapi(model: Type[BaseModel]) -> dict:
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": model.model_json_schema()},
+                ARROW_MEDIA_TYPE: {},
+                RAW_MEDIA_TYPE: {},
+            },
+        }
+    }
+
+
+@app.post(
+    "/predict",
+    response_model=PredictResponse,
+    tags=["IA"],
+    openapi_extra=predict_openapi(PredictRequest),
+)
+async def predict(http_request: Request):
+    vectors, fmt = await read_predict_body(http_request, PredictRequest)
+    data = vectors[0] if len(vectors) == 1 else []
+    logger.info(f"Appel endpoint /predict ({fmt}) avec {len(data)} valeurs")
     try:
-        if not request.data:
+        if len(vectors) != 1:
+            raise ValueError("Un seul vecteur est attendu.")
+        if not len(data):
             raise ValueError("La liste de données ne peut pas être vide.")
-        prediction = sum(request.data) / len(request.data)
-        with mlflow.start_run(run_name="predict"):
-            mlflow.log_param("nb_inputs", len(request.data))
-            mlflow.log_metric("prediction", prediction)
+        prediction, error = await batcher.submit(data)
+        if error:
+            raise ValueError(error)
+        tracker.log_run(
+            "predict",
+            params={"nb_inputs": len(data), "format": fmt},
+            metrics={"prediction": prediction},
+        )
         logger.success(f"Prédiction réussie: {prediction}")
-        return PredictResponse(prediction=prediction)
+        accept = http_request.headers.get("accept", "")
+        binary = encode_predictions(
+            [(prediction, None)], response_format(accept, fmt)
+        )
+        return binary or PredictResponse(prediction=prediction)
     except Exception as e:
         logger.error(f"Erreur dans /predict : {e}")
         notify_discord(f"Erreur /predict : {str(e)}", status="Erreur")
@@ -104,11 +228,74 @@ async def predict(request: PredictRequest):
         )
 
 
+@app.post(
+    "/predict/batch",
+    response_model=PredictBatchResponse,
+    tags=["IA"],
+    openapi_extra=predict_openapi(PredictBatchRequest),
+)
+async def predict_batch_endpoint(http_request: Request):
+    vectors, fmt = await read_predict_body(http_request, PredictBatchRequest)
+    nb_vectors = len(vectors)
+    logger.info(
+        f"Appel endpoint /predict/batch ({fmt}) avec {nb_vectors} vecteurs"
+    )
+    try:
+        if not vectors:
+            raise ValueError("Le lot de données ne peut pas être vide.")
+        if nb_vectors > PREDICT_BATCH_MAX_ITEMS:
+            raise ValueError(
+                f"Le lot dépasse la taille maximale ({PREDICT_BATCH_MAX_ITEMS})."
+            )
+        results = await executor.predict_batch(vectors)
+        nb_errors = sum(1 for _, error in results if error)
+        tracker.log_run(
+            "predict_batch",
+            params={
+                "nb_vectors": nb_vectors,
+                "nb_inputs": sum(len(v) for v in vectors),
+                "format": fmt,
+            },
+            metrics={"nb_errors": nb_errors},
+        )
+        logger.success(
+            f"Prédiction par lot réussie : {nb_vectors - nb_errors}/{nb_vectors}"
+        )
+        accept = http_request.headers.get("accept", "")
+        binary = encode_predictions(results, response_format(accept, fmt))
+        return binary or PredictBatchResponse(
+            predictions=[
+                PredictBatchItem(prediction=prediction, error=error)
+                for prediction, error in results
+            ]
+        )
+    except Exception as e:
+        logger.error(f"Erreur dans /predict/batch : {e}")
+        notify_discord(f"Erreur /predict/batch : {str(e)}", status="Erreur")
+        raise HTTPException(
+            status_code=400, detail=f"Erreur lors de la prédiction : {str(e)}"
+        )
+
+
+@app.post("/predict/stream", tags=["IA"])
+async def predict_stream(http_request: Request):
+    fmt = detect_format(http_request.headers.get("content-type", ""))
+    logger.info(f"Appel endpoint /predict/stream (format {fmt})")
+    return RequestStreamingResponse(
+        score_stream(http_request.stream(), fmt),
+        media_type="application/x-ndjson",
+    )
+
+
 @app.post("/generate", response_model=GenerateResponse, tags=["IA"])
 async def generate(request: GenerateRequest):
     logger.info(f"Appel endpoint /generate avec prompt='{request.prompt}'")
     try:
-        result = f"Résultat généré pour le prompt : {request.prompt}"
+        result = await prompt_cache.get_or_compute(
+            request.prompt,
+            GENERATION_MODEL_VERSION,
+            lambda: executor.run(generate_text, request.prompt),
+        )
         logger.success("Génération réussie pour le prompt")
         return GenerateResponse(result=result)
     except Exception as e:
@@ -119,16 +306,39 @@ async def generate(request: GenerateRequest):
         )
 
 
-@app.post("/retrain", tags=["IA"])
+@app.post("/generate/stream", tags=["IA"])
+async def generate_stream(request: GenerateRequest, http_request: Request):
+    media_type = negotiate_stream_format(
+        http_request.headers.get("accept", "")
+    )
+    logger.info(
+        f"Appel endpoint /generate/stream ({media_type}) avec prompt='{request.prompt}'"
+    )
+    return StreamingResponse(
+        stream_generation(http_request, request.prompt, media_type),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/retrain", status_code=status.HTTP_202_ACCEPTED, tags=["IA"])
 async def retrain():
     logger.info("Appel endpoint /retrain")
     try:
-        notify_discord("Déclenchement du retrain via l’API", status="Info")
-        with mlflow.start_run(run_name="retrain"):
-            mlflow.log_param("event", "retrain_triggered")
-            mlflow.log_metric("status", 1)
-        logger.success("Retrain déclenché avec succès")
-        return {"message": "Retrain déclenché (simulation)"}
+        job, deduplicated = await asyncio.to_thread(retrain_jobs.submit)
+        if deduplicated:
+            logger.info(f"Retrain déjà en cours, job existant {job.id}")
+            message = "Retrain déjà en cours"
+        else:
+            notify_discord("Déclenchement du retrain via l’API", status="Info")
+            logger.success(f"Retrain mis en file d'attente : job {job.id}")
+            message = "Retrain mis en file d'attente"
+        return {
+            "message": message,
+            "job_id": job.id,
+            "status": job.status,
+            "deduplicated": deduplicated,
+        }
     except Exception as e:
         logger.error(f"Erreur dans /retrain : {e}")
         notify_discord(f"Erreur /retrain : {str(e)}", status="Erreur")
@@ -137,6 +347,28 @@ async def retrain():
         )
 
 
+@app.get("/retrain/{job_id}", tags=["IA"])
+async def retrain_status(job_id: str):
+    job = retrain_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job de retrain inconnu")
+    return job
+
+
+@app.delete("/retrain/{job_id}", tags=["IA"])
+async def cancel_retrain(job_id: str):
+    logger.info(f"Annulation du job de retrain {job_id} demandée")
+    job = retrain_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job de retrain inconnu")
+    if job["status"] not in ("queued", "running"):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job de retrain déjà terminé ({job['status']})",
+        )
+    return job
+
+
 # --- Gestion globale des exceptions ---
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
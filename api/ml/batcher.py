@@ -0,0 +1,149 @@
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, List, Optional, Sequence, Set, Tuple
+from prometheus_client import Histogram
+from api.ml.executor import executor
+from api.ml.predictor import PredictionResult
+from api.utils.logger import logger
+
+PREDICT_MAX_BATCH_SIZE = int(os.getenv("PREDICT_MAX_BATCH_SIZE", "64"))
+PREDICT_MAX_WAIT_MS = float(os.getenv("PREDICT_MAX_WAIT_MS", "5"))
+
+MICROBATCH_SIZE = Histogram(
+    "predict_microbatch_size",
+    "Nombre de requêtes /predict regroupées par appel au modèle",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+MICROBATCH_QUEUE_WAIT = Histogram(
+    "predict_microbatch_queue_wait_seconds",
+    "Temps passé par une requête /predict dans la file du micro-batcher",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+PendingItem = Tuple[Sequence[float], "asyncio.Future[PredictionResult]", float]
+
+
+class MicroBatcher:
+    """
+    Regroupe les appels concurrents à /predict (jusqu'à `max_batch_size`
+    éléments ou `max_wait_ms` millisecondes) pour les évaluer en un seul appel
+    vectorisé du modèle, puis résout individuellement le future de chaque
+    appelant.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[
+            [Sequence[Sequence[float]]], Awaitable[List[PredictionResult]]
+        ] = executor.predict_batch,
+        max_batch_size: int = PREDICT_MAX_BATCH_SIZE,
+        max_wait_ms: float = PREDICT_MAX_WAIT_MS,
+    ):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight: Set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._task = self._loop.create_task(self._run())
+        logger.info(
+            f"Micro-batcher démarré (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait * 1000:g})"
+        )
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        self._fail_pending([])
+        self._task = None
+        self._queue = None
+        logger.info("Micro-batcher arrêté")
+
+    async def submit(self, data: Sequence[float]) -> PredictionResult:
+        """Ajoute un vecteur au prochain lot et attend sa prédiction."""
+        if (
+            self._task is None
+            or self._task.done()
+            or self._loop is not asyncio.get_running_loop()
+        ):
+            self.start()
+        future = self._loop.create_future()
+        self._queue.put_nowait((data, future, time.perf_counter()))
+        return await future
+
+    async def _run(self) -> None:
+        batch: List[PendingItem] = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = self._loop.time() + self.max_wait
+                while len(batch) < self.max_batch_size:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    remaining = deadline - self._loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(
+                            await asyncio.wait_for(
+                                self._queue.get(), remaining
+                            )
+                        )
+                    except asyncio.TimeoutError:
+                        break
+                # Les lots sont évalués en parallèle par l'exécuteur
+                # d'inférence
+                task = self._loop.create_task(self._flush(batch))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+                batch = []
+        except asyncio.CancelledError:
+            # Lot en cours de constitution : ses appelants n'attendent pas
+            # indéfiniment un résultat qui ne viendra plus
+            self._fail_pending(batch)
+            raise
+
+    def _fail_pending(self, batch: List[PendingItem]) -> None:
+        """Fait échouer les requêtes de `batch` et celles encore en file."""
+        pending = list(batch)
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for _, future, _ in pending:
+            if not future.done():
+                future.set_exception(
+                    RuntimeError("Micro-batcher arrêté avant traitement.")
+                )
+
+    async def _flush(self, batch: List[PendingItem]) -> None:
+        now = time.perf_counter()
+        MICROBATCH_SIZE.observe(len(batch))
+        for _, _, enqueued_at in batch:
+            MICROBATCH_QUEUE_WAIT.observe(now - enqueued_at)
+        try:
+            results = await self.predict_fn([data for data, _, _ in batch])
+        except Exception as e:
+            logger.error(f"Erreur du micro-batcher sur un lot : {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+batcher = MicroBatcher()
@@ -0,0 +1,205 @@
+import codecs
+import csv
+import json
+import os
+import resource
+import time
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+from api.ml.executor import executor
+from api.utils.logger import logger
+
+BULK_CHUNK_ROWS = int(os.getenv("BULK_CHUNK_ROWS", "1000"))
+BULK_MAX_LINE_BYTES = int(os.getenv("BULK_MAX_LINE_BYTES", str(1024 * 1024)))
+
+BULK_FORMATS = ("ndjson", "csv")
+
+BULK_ROWS = Counter(
+    "bulk_scoring_rows_total",
+    "Lignes traitées par /predict/stream",
+    ["outcome"],
+)
+BULK_ROWS_PER_SECOND = Histogram(
+    "bulk_scoring_rows_per_second",
+    "Débit d'un flux /predict/stream",
+    buckets=(100, 1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000),
+)
+BULK_PEAK_BUFFER = Gauge(
+    "bulk_scoring_peak_buffer_bytes",
+    "Mémoire tampon maximale utilisée par le dernier flux /predict/stream",
+)
+
+ParsedRow = Tuple[int, Optional[List[float]], Optional[str]]
+
+
+class RequestStreamingResponse(StreamingResponse):
+    """
+    Réponse en flux dont le générateur consomme lui-même le corps de la
+    requête : contrairement à `StreamingResponse`, aucune tâche concurrente
+    n'écoute `receive` (elle avalerait les blocs du corps envoyé).
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+def detect_format(content_type: str) -> str:
+    """CSV si le client l'annonce, NDJSON sinon."""
+    return "csv" if "csv" in content_type else "ndjson"
+
+
+def _parse_ndjson(line: str) -> List[float]:
+    value = json.loads(line)
+    if isinstance(value, dict):
+        value = value.get("data")
+    if not isinstance(value, list):
+        raise ValueError(
+            "Ligne attendue : liste de nombres ou {'data': [...]}"
+        )
+    return [float(x) for x in value]
+
+
+def _parse_lines(
+    lines: Sequence[Tuple[int, str]], fmt: str, skip_header: bool
+) -> Tuple[List[ParsedRow], bool]:
+    """Analyse un bloc de lignes ; les lignes invalides portent leur erreur."""
+    rows: List[ParsedRow] = []
+    if fmt == "csv":
+        records = zip(lines, csv.reader(line for _, line in lines))
+        for (number, _), record in records:
+            try:
+                rows.append((number, [float(x) for x in record], None))
+            except ValueError as e:
+                if skip_header:
+                    skip_header = False
+                    continue
+                rows.append((number, None, f"Ligne CSV invalide : {e}"))
+            skip_header = False
+    else:
+        for number, line in lines:
+            try:
+                rows.append((number, _parse_ndjson(line), None))
+            except (ValueError, TypeError) as e:
+                rows.append((number, None, f"Ligne NDJSON invalide : {e}"))
+    return rows, skip_header
+
+
+async def score_stream(
+    body: AsyncIterator[bytes], fmt: str, chunk_rows: int = BULK_CHUNK_ROWS
+) -> AsyncIterator[str]:
+    """
+    Lit le corps de la requête au fil de l'eau, évalue les lignes par blocs
+    de `chunk_rows` avec le modèle de /predict et renvoie un résultat NDJSON
+    par ligne, puis un résumé. La mémoire utilisée est bornée par la taille
+    d'un bloc, quelle que soit la taille du fichier.
+    """
+    started = time.perf_counter()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    carry = ""
+    pending: List[Tuple[int, str]] = []
+    pending_bytes = 0
+    peak_buffer = 0
+    line_number = 0
+    nb_rows = nb_errors = 0
+    skip_header = fmt == "csv"
+    discarding = False
+
+    async def flush() -> AsyncIterator[str]:
+        nonlocal nb_rows, nb_errors, skip_header
+        if not pending:
+            return
+        rows, skip_header = _parse_lines(pending, fmt, skip_header)
+        valid = [(number, data) for number, data, error in rows if not error]
+        results = await executor.predict_batch([data for _, data in valid])
+        predictions = dict(zip((number for number, _ in valid), results))
+        out = []
+        for number, _, error in rows:
+            if not error:
+                prediction, error = predictions[number]
+            if error:
+                nb_errors += 1
+                out.append(json.dumps({"row": number, "error": error}))
+            else:
+                out.append(
+                    json.dumps({"row": number, "prediction": prediction})
+                )
+        nb_rows += len(rows)
+        if out:
+            yield "\n".join(out) + "\n"
+
+    async for chunk in body:
+        text = carry + decoder.decode(chunk)
+        lines = text.split("\n")
+        carry = lines.pop()
+        if discarding and lines:
+            # Fin de la ligne trop longue déjà signalée
+            lines.pop(0)
+            discarding = False
+        for line in lines:
+            line_number += 1
+            line = line.strip()
+            if not line:
+                continue
+            pending.append((line_number, line))
+            pending_bytes += len(line)
+            if len(pending) >= chunk_rows:
+                peak_buffer = max(peak_buffer, pending_bytes + len(carry))
+                async for out in flush():
+                    yield out
+                pending, pending_bytes = [], 0
+        peak_buffer = max(peak_buffer, pending_bytes + len(carry))
+        if len(carry) > BULK_MAX_LINE_BYTES:
+            if not discarding:
+                # Les lignes précédentes sont renvoyées avant l'erreur
+                async for out in flush():
+                    yield out
+                pending, pending_bytes = [], 0
+                line_number += 1
+                nb_rows += 1
+                nb_errors += 1
+                error = {"row": line_number, "error": "Ligne trop longue"}
+                yield json.dumps(error) + "\n"
+                discarding = True
+            carry = ""
+
+    carry += decoder.decode(b"", final=True)
+    if carry.strip() and not discarding:
+        line_number += 1
+        pending.append((line_number, carry.strip()))
+    if pending:
+        async for out in flush():
+            yield out
+
+    duration = time.perf_counter() - started
+    rows_per_second = nb_rows / duration if duration > 0 else 0.0
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    BULK_ROWS.labels(outcome="ok").inc(nb_rows - nb_errors)
+    BULK_ROWS.labels(outcome="error").inc(nb_errors)
+    BULK_ROWS_PER_SECOND.observe(rows_per_second)
+    BULK_PEAK_BUFFER.set(peak_buffer)
+    logger.info(
+        f"Scoring en flux terminé : {nb_rows} lignes ({nb_errors} erreurs) "
+        f"en {duration:.2f}s, {rows_per_second:.0f} lignes/s"
+    )
+    yield (
+        json.dumps(
+            {
+                "done": True,
+                "rows": nb_rows,
+                "errors": nb_errors,
+                "duration_seconds": round(duration, 3),
+                "rows_per_second": round(rows_per_second, 1),
+                "peak_buffer_bytes": peak_buffer,
+                "max_rss_kb": max_rss_kb,
+            }
+        )
+        + "\n"
+    )
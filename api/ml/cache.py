@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import os
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List
+from prometheus_client import Counter, Gauge
+from api.utils.logger import logger
+
+PROMPT_CACHE_MAX_ENTRIES = int(os.getenv("PROMPT_CACHE_MAX_ENTRIES", "1024"))
+PROMPT_CACHE_TTL_SECONDS = float(os.getenv("PROMPT_CACHE_TTL_SECONDS", "300"))
+
+PROMPT_CACHE_HITS = Counter(
+    "prompt_cache_hits_total", "Résultats /generate servis depuis le cache"
+)
+PROMPT_CACHE_MISSES = Counter(
+    "prompt_cache_misses_total", "Résultats /generate calculés par le modèle"
+)
+PROMPT_CACHE_EVICTIONS = Counter(
+    "prompt_cache_evictions_total",
+    "Entrées retirées du cache de prompts",
+    ["reason"],
+)
+PROMPT_CACHE_ENTRIES = Gauge(
+    "prompt_cache_entries", "Nombre d'entrées du cache de prompts"
+)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Forme canonique d'un prompt : Unicode NFC, espaces normalisés."""
+    return " ".join(unicodedata.normalize("NFC", prompt).split())
+
+
+@dataclass
+class CacheEntry:
+    prompt: str
+    model_version: str
+    value: Any
+    created_at: float
+    expires_at: float
+
+
+def _retrieve_exception(task: asyncio.Future) -> None:
+    # Évite l'avertissement si tous les appelants ont été annulés
+    if not task.cancelled():
+        task.exception()
+
+
+class PromptCache:
+    """
+    Cache LRU + TTL des résultats de génération, indexé par prompt
+    normalisé et version du modèle. Les appels concurrents pour une même
+    clé partagent un seul calcul (single-flight).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = PROMPT_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = PROMPT_CACHE_TTL_SECONDS,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(prompt: str, model_version: str) -> str:
+        raw = f"{model_version}\x00{normalize_prompt(prompt)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get_or_compute(
+        self,
+        prompt: str,
+        model_version: str,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        key = self.make_key(prompt, model_version)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                PROMPT_CACHE_HITS.inc()
+                return entry.value
+            self._remove(key, "ttl")
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.hits += 1
+            PROMPT_CACHE_HITS.inc()
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        PROMPT_CACHE_MISSES.inc()
+        # Calcul détaché de l'appelant : l'annulation de la première requête
+        # (client déconnecté) n'interrompt pas celles qui l'attendent aussi
+        task = asyncio.ensure_future(
+            self._compute(key, prompt, model_version, compute)
+        )
+        task.add_done_callback(_retrieve_exception)
+        self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _compute(
+        self,
+        key: str,
+        prompt: str,
+        model_version: str,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        try:
+            value = await compute()
+        finally:
+            self._inflight.pop(key, None)
+        self._store(key, prompt, model_version, value)
+        return value
+
+    def _store(
+        self, key: str, prompt: str, model_version: str, value: Any
+    ) -> None:
+        now = time.monotonic()
+        self._entries[key] = CacheEntry(
+            normalize_prompt(prompt),
+            model_version,
+            value,
+            now,
+            now + self.ttl_seconds,
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)), "lru")
+        PROMPT_CACHE_ENTRIES.set(len(self._entries))
+
+    def _remove(self, key: str, reason: str) -> None:
+        self._entries.pop(key, None)
+        self.evictions += 1
+        PROMPT_CACHE_EVICTIONS.labels(reason=reason).inc()
+        PROMPT_CACHE_ENTRIES.set(len(self._entries))
+
+    def purge(self) -> int:
+        """Vide le cache et renvoie le nombre d'entrées supprimées."""
+        count = len(self._entries)
+        self._entries.clear()
+        PROMPT_CACHE_EVICTIONS.labels(reason="purge").inc(count)
+        PROMPT_CACHE_ENTRIES.set(0)
+        logger.info(f"Cache de prompts purgé ({count} entrées)")
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def entries(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Entrées les plus récemment utilisées, pour inspection."""
+        now = time.monotonic()
+        return [
+            {
+                "prompt": entry.prompt,
+                "model_version": entry.model_version,
+                "age_seconds": round(now - entry.created_at, 3),
+                "ttl_remaining_seconds": round(entry.expires_at - now, 3),
+            }
+            for entry in list(reversed(self._entries.values()))[:limit]
+        ]
+
+
+prompt_cache = PromptCache()
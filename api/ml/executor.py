@@ -0,0 +1,216 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from multiprocessing import shared_memory
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+import numpy as np
+from prometheus_client import Gauge
+from api.ml.predictor import PredictionResult, predict_batch
+from api.ml.registry import LoadedModel, load_model, registry
+from api.utils.logger import logger
+
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread")
+INFERENCE_WORKERS = int(
+    os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "inference_executor_queue_depth",
+    "Tâches d'inférence soumises à l'exécuteur et non terminées",
+)
+
+ModelSpec = Tuple[str, str, str]
+
+# Modèle préchargé dans chaque processus worker (mode "process")
+_worker_model: Any = None
+
+
+def _init_worker(spec: ModelSpec) -> None:
+    global _worker_model
+    _worker_model, _ = load_model(*spec)
+
+
+def _ping_worker() -> int:
+    return os.getpid()
+
+
+def _predict_shared(
+    shm_name: str, lengths: List[int]
+) -> List[PredictionResult]:
+    """
+    Évalue un lot déposé en mémoire partagée : les vecteurs sont des vues
+    NumPy sur le segment, sans copie ni sérialisation des données.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        values = np.ndarray((sum(lengths),), dtype=np.float64, buffer=shm.buf)
+        bounds = np.cumsum(lengths)[:-1]
+        vectors = np.split(values, bounds)
+        results = predict_batch(vectors, _worker_model)
+        del values, vectors
+        return results
+    finally:
+        shm.close()
+
+
+class InferenceExecutor:
+    """
+    Exécute le calcul des modèles hors de la boucle asyncio : en ligne
+    ("inline"), dans un pool de threads ("thread") ou dans un pool de
+    processus dont chaque worker précharge le modèle actif ("process").
+    """
+
+    def __init__(
+        self,
+        mode: str = INFERENCE_EXECUTOR,
+        max_workers: int = INFERENCE_WORKERS,
+    ):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Mode d'exécuteur inconnu : {mode}")
+        self.mode = mode
+        self.max_workers = max(1, max_workers)
+        self._pool: Optional[Executor] = None
+
+    def start(self) -> None:
+        if self._pool is not None or self.mode == "inline":
+            return
+        if self.mode == "thread":
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="inference"
+            )
+        else:
+            self._pool = self._process_pool(registry.active.key_spec())
+            registry.subscribe(self.reload)
+        logger.info(
+            f"Exécuteur d'inférence démarré (mode={self.mode}, "
+            f"workers={self.max_workers})"
+        )
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            logger.info("Exécuteur d'inférence arrêté")
+
+    def _process_pool(self, spec: ModelSpec) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(spec,),
+        )
+
+    async def reload(self, loaded: LoadedModel) -> None:
+        """
+        Remplace le pool de processus par un pool dont les workers ont
+        préchargé `loaded` ; l'ancien pool termine les tâches en cours.
+        """
+        if self.mode != "process" or self._pool is None:
+            return
+        pool = self._process_pool(loaded.key_spec())
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *[
+                loop.run_in_executor(pool, _ping_worker)
+                for _ in range(self.max_workers)
+            ]
+        )
+        old, self._pool = self._pool, pool
+        old.shutdown(wait=False)
+        logger.info(
+            f"Workers d'inférence rechargés avec {loaded.name}:{loaded.version}"
+        )
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Exécute `fn(*args)` selon le mode configuré."""
+        if self.mode == "inline":
+            return fn(*args)
+        self.start()
+        EXECUTOR_QUEUE_DEPTH.inc()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, fn, *args)
+        finally:
+            EXECUTOR_QUEUE_DEPTH.dec()
+
+    async def stream(
+        self, fn: Callable[..., Iterator[Any]], *args: Any
+    ) -> AsyncIterator[Any]:
+        """
+        Itère sur le générateur `fn(*args)` en calculant chaque élément hors
+        de la boucle. Un générateur ne pouvant pas changer de processus, le
+        mode "process" calcule le flux dans un thread. L'itérateur est fermé
+        dès que le consommateur s'arrête (client déconnecté).
+        """
+        iterator = fn(*args)
+        done = object()
+        pool: Optional[Executor] = None
+        if self.mode == "thread":
+            self.start()
+            pool = self._pool
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                if self.mode == "inline":
+                    item = next(iterator, done)
+                else:
+                    EXECUTOR_QUEUE_DEPTH.inc()
+                    try:
+                        item = await loop.run_in_executor(
+                            pool, next, iterator, done
+                        )
+                    finally:
+                        EXECUTOR_QUEUE_DEPTH.dec()
+                if item is done:
+                    return
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except ValueError:
+                    # Élément encore en cours de calcul dans un thread
+                    pass
+
+    async def predict_batch(
+        self, vectors: Sequence[Sequence[float]]
+    ) -> List[PredictionResult]:
+        if self.mode != "process":
+            return await self.run(predict_batch, vectors)
+        lengths = [len(v) for v in vectors]
+        shm = shared_memory.SharedMemory(
+            create=True, size=max(1, sum(lengths)) * 8
+        )
+        try:
+            values = np.ndarray(
+                (sum(lengths),), dtype=np.float64, buffer=shm.buf
+            )
+            offset = 0
+            for vector, length in zip(vectors, lengths):
+                values[offset : offset + length] = vector
+                offset += length
+            del values
+            return await self.run(_predict_shared, shm.name, lengths)
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+executor = InferenceExecutor()
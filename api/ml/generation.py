@@ -0,0 +1,19 @@
+import os
+from typing import Iterator
+
+GENERATION_MODEL_VERSION = os.getenv("GENERATION_MODEL_VERSION", "demo-1")
+
+
+def iter_tokens(prompt: str) -> Iterator[str]:
+    """
+    Produit le résultat d'un prompt token par token (modèle de
+    démonstration) : chaque token est disponible dès qu'il est calculé.
+    """
+    words = f"Résultat généré pour le prompt : {prompt}".split(" ")
+    for index, word in enumerate(words):
+        yield word if index == len(words) - 1 else f"{word} "
+
+
+def generate_text(prompt: str) -> str:
+    """Génère le résultat complet pour un prompt."""
+    return "".join(iter_tokens(prompt))
@@ -0,0 +1,199 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Optional, Tuple
+from prometheus_client import Gauge
+from api.utils.logger import logger
+
+RETRAIN_JOB_HISTORY = int(os.getenv("RETRAIN_JOB_HISTORY", "100"))
+RETRAIN_CANCEL_GRACE_SECONDS = float(
+    os.getenv("RETRAIN_CANCEL_GRACE_SECONDS", "5")
+)
+
+ACTIVE_STATUSES = ("queued", "running")
+FINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+RETRAIN_JOBS_ACTIVE = Gauge(
+    "retrain_jobs_active", "Jobs de retrain en file ou en cours"
+)
+
+
+@dataclass
+class RetrainJob:
+    id: str
+    status: str = "queued"
+    progress: float = 0.0
+    message: str = ""
+    result: Optional[Dict[str, float]] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+def _retrain_worker(job_id: str, events, cancel_event) -> None:
+    """Point d'entrée du processus de retrain (hors du processus API)."""
+    from api.ml.tracking import tracker
+    from api.ml.training import RetrainCancelled, run_retrain
+
+    def report(progress: float, message: str) -> None:
+        events.put(("progress", progress, message))
+
+    events.put(("running", 0.0, "Entraînement démarré"))
+    try:
+        result = run_retrain(report, cancel_event.is_set)
+        tracker.log_run(
+            "retrain", params={"job_id": job_id}, metrics=dict(result)
+        )
+        events.put(("succeeded", 1.0, result))
+    except RetrainCancelled as e:
+        events.put(("cancelled", None, str(e)))
+    except Exception as e:
+        events.put(("failed", None, str(e)))
+    finally:
+        tracker.stop()
+
+
+class RetrainJobManager:
+    """
+    Exécute les retrains dans un processus dédié : la requête HTTP ne fait
+    qu'enregistrer le job. Un seul retrain est actif à la fois : un nouveau
+    déclenchement pendant un retrain renvoie le job existant.
+    """
+
+    def __init__(self, history: int = RETRAIN_JOB_HISTORY):
+        self.history = history
+        self._jobs: "OrderedDict[str, RetrainJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._ctx = multiprocessing.get_context("spawn")
+        self._process: Optional[multiprocessing.process.BaseProcess] = None
+        self._cancel_event: Any = None
+
+    def _active_job(self) -> Optional[RetrainJob]:
+        for job in self._jobs.values():
+            if job.status in ACTIVE_STATUSES:
+                return job
+        return None
+
+    def submit(self) -> Tuple[RetrainJob, bool]:
+        """Crée un job, ou renvoie le job actif (dédupliqué=True)."""
+        with self._lock:
+            active = self._active_job()
+            if active is not None:
+                return active, True
+            job = RetrainJob(id=uuid.uuid4().hex)
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.history:
+                oldest = next(iter(self._jobs))
+                if self._jobs[oldest].status in ACTIVE_STATUSES:
+                    break
+                self._jobs.pop(oldest)
+            events = self._ctx.Queue()
+            self._cancel_event = self._ctx.Event()
+            self._process = self._ctx.Process(
+                target=_retrain_worker,
+                args=(job.id, events, self._cancel_event),
+                name=f"retrain-{job.id[:8]}",
+            )
+            self._process.start()
+            RETRAIN_JOBS_ACTIVE.inc()
+        threading.Thread(
+            target=self._monitor,
+            args=(job, self._process, events),
+            name=f"retrain-monitor-{job.id[:8]}",
+            daemon=True,
+        ).start()
+        logger.info(f"Job de retrain {job.id} lancé")
+        return job, False
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return asdict(job) if job else None
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Demande l'arrêt coopératif du job, puis le force après un délai."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in ACTIVE_STATUSES:
+                return asdict(job) if job else None
+            job.message = "Annulation demandée"
+            self._cancel_event.set()
+            process = self._process
+        timer = threading.Timer(
+            RETRAIN_CANCEL_GRACE_SECONDS, self._terminate, args=(process,)
+        )
+        timer.daemon = True
+        timer.start()
+        logger.info(f"Annulation du job de retrain {job_id} demandée")
+        return self.get(job_id)
+
+    def _terminate(self, process) -> None:
+        if process.is_alive():
+            logger.warning(f"Arrêt forcé du processus {process.name}")
+            process.terminate()
+
+    def _monitor(self, job: RetrainJob, process, events) -> None:
+        while True:
+            try:
+                status, progress, payload = events.get(timeout=0.5)
+            except queue.Empty:
+                if process.is_alive():
+                    continue
+                # Le dernier événement a pu arriver entre le délai d'attente
+                # et la fin du processus : il prime sur le code de sortie
+                process.join()
+                try:
+                    status, progress, payload = events.get_nowait()
+                except queue.Empty:
+                    status, progress, payload = self._exit_status(job, process)
+            with self._lock:
+                if progress is not None:
+                    job.progress = progress
+                if status == "running":
+                    job.status, job.started_at = "running", time.time()
+                    job.message = payload
+                elif status == "progress":
+                    job.message = payload
+                elif status == "succeeded":
+                    job.result = payload
+                    job.message = "Retrain terminé"
+                else:
+                    job.error = payload
+                    job.message = payload
+                if status in FINAL_STATUSES:
+                    job.status, job.finished_at = status, time.time()
+                    RETRAIN_JOBS_ACTIVE.dec()
+            if status in FINAL_STATUSES:
+                process.join()
+                logger.info(f"Job de retrain {job.id} terminé : {status}")
+                return
+
+    def _exit_status(self, job: RetrainJob, process) -> Tuple[str, None, str]:
+        if self._cancel_event is not None and self._cancel_event.is_set():
+            return "cancelled", None, "Processus de retrain arrêté"
+        return (
+            "failed",
+            None,
+            f"Processus de retrain terminé (code {process.exitcode})",
+        )
+
+    async def shutdown(self) -> None:
+        """Annule le job actif à l'arrêt de l'API."""
+        with self._lock:
+            active = self._active_job()
+        if active is not None:
+            self.cancel(active.id)
+            await asyncio.to_thread(
+                self._process.join, RETRAIN_CANCEL_GRACE_SECONDS
+            )
+            self._terminate(self._process)
+
+
+retrain_jobs = RetrainJobManager()
@@ -0,0 +1,175 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from fastapi import Response
+from api.ml.predictor import PredictionResult
+
+JSON_MEDIA_TYPE = "application/json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+RAW_MEDIA_TYPE = "application/octet-stream"
+
+PAYLOAD_FORMATS = {
+    JSON_MEDIA_TYPE: "json",
+    ARROW_MEDIA_TYPE: "arrow",
+    RAW_MEDIA_TYPE: "raw",
+}
+RAW_DTYPES = {"float32": "<f4", "float64": "<f8"}
+
+
+class PayloadError(ValueError):
+    """Corps binaire illisible ou format non pris en charge."""
+
+
+def parse_media_type(header: str) -> Tuple[str, Dict[str, str]]:
+    """Sépare `type/sous-type; clé=valeur` en type et paramètres."""
+    mime, *raw_params = header.split(";")
+    params = {}
+    for param in raw_params:
+        key, _, value = param.partition("=")
+        params[key.strip().lower()] = value.strip().strip('"')
+    return mime.strip().lower(), params
+
+
+def request_format(content_type: str) -> str:
+    """Format du corps (json, arrow ou raw) ; JSON par défaut."""
+    mime, _ = parse_media_type(content_type)
+    return PAYLOAD_FORMATS.get(mime, "json")
+
+
+def response_format(accept: str, request_fmt: str) -> str:
+    """
+    Premier format binaire demandé par `Accept` ; sans préférence explicite
+    (`*/*` ou en-tête absent), la réponse reprend le format de la requête.
+    """
+    for entry in accept.split(","):
+        mime, _ = parse_media_type(entry)
+        if mime in PAYLOAD_FORMATS:
+            return PAYLOAD_FORMATS[mime]
+        if mime in ("", "*/*"):
+            return request_fmt
+    return "json"
+
+
+def _load_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise PayloadError("Format Arrow indisponible : pyarrow non installé.")
+    return pyarrow
+
+
+def _split_list_column(pa, column) -> List[np.ndarray]:
+    if column.null_count:
+        raise PayloadError("La colonne Arrow contient des vecteurs nuls.")
+    if pa.types.is_fixed_size_list(column.type):
+        width = column.type.list_size
+        values = column.flatten().to_numpy(zero_copy_only=True)
+        return list(values.reshape(-1, width))
+    if not pa.types.is_list(column.type) and not pa.types.is_large_list(
+        column.type
+    ):
+        raise PayloadError(
+            "La colonne Arrow doit être une liste de flottants."
+        )
+    offsets = column.offsets.to_numpy()
+    values = column.values.to_numpy(zero_copy_only=True)
+    values = values[offsets[0] : offsets[-1]]
+    return np.split(values, offsets[1:-1] - offsets[0])
+
+
+def _decode_arrow(body: bytes) -> List[np.ndarray]:
+    pa = _load_pyarrow()
+    try:
+        reader = pa.ipc.open_stream(pa.py_buffer(body))
+        vectors: List[np.ndarray] = []
+        for batch in reader:
+            if batch.num_columns == 1:
+                column = batch.column(0)
+            elif "data" in batch.schema.names:
+                column = batch.column("data")
+            else:
+                raise PayloadError("Colonne Arrow 'data' introuvable.")
+            if not pa.types.is_floating(column.type.value_type):
+                raise PayloadError(
+                    "La colonne Arrow doit être une liste de flottants."
+                )
+            vectors.extend(_split_list_column(pa, column))
+    except (pa.ArrowInvalid, pa.ArrowTypeError, AttributeError) as e:
+        raise PayloadError(f"Flux Arrow invalide : {e}")
+    return vectors
+
+
+def _decode_raw(body: bytes, params: Dict[str, str]) -> List[np.ndarray]:
+    dtype = RAW_DTYPES.get(params.get("dtype", "float64"))
+    if dtype is None:
+        raise PayloadError("Paramètre dtype attendu : float32 ou float64.")
+    itemsize = np.dtype(dtype).itemsize
+    if len(body) % itemsize:
+        raise PayloadError(
+            f"Taille du corps non multiple de {itemsize} octets."
+        )
+    values = np.frombuffer(body, dtype=dtype)
+    if "dim" not in params:
+        return [values]
+    try:
+        dim = int(params["dim"])
+    except ValueError:
+        raise PayloadError("Paramètre dim invalide.")
+    if dim <= 0 or values.size % dim:
+        raise PayloadError(
+            f"{values.size} valeurs ne forment pas "
+            f"des vecteurs de taille {dim}."
+        )
+    return list(values.reshape(-1, dim))
+
+
+def decode_vectors(body: bytes, content_type: str) -> List[np.ndarray]:
+    """
+    Décode un corps Arrow IPC (colonne de listes de flottants, une ligne par
+    vecteur) ou un tampon brut little-endian
+    (`application/octet-stream; dtype=float32; dim=N`) en vecteurs NumPy
+    qui partagent la mémoire du corps, sans copie.
+    """
+    mime, params = parse_media_type(content_type)
+    if mime == ARROW_MEDIA_TYPE:
+        return _decode_arrow(body)
+    if mime == RAW_MEDIA_TYPE:
+        return _decode_raw(body, params)
+    raise PayloadError(f"Type de contenu non pris en charge : {mime}")
+
+
+def _encode_arrow(results: Sequence[PredictionResult]) -> bytes:
+    pa = _load_pyarrow()
+    batch = pa.record_batch(
+        [
+            pa.array([p for p, _ in results], type=pa.float64()),
+            pa.array([e for _, e in results], type=pa.string()),
+        ],
+        names=["prediction", "error"],
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_predictions(
+    results: Sequence[PredictionResult], fmt: str
+) -> Optional[Response]:
+    """
+    Réponse binaire des prédictions : Arrow IPC (colonnes `prediction` et
+    `error`) ou tampon float64 little-endian (NaN pour une entrée en erreur,
+    nombre d'erreurs dans `X-Prediction-Errors`). None pour le JSON.
+    """
+    if fmt == "arrow":
+        return Response(_encode_arrow(results), media_type=ARROW_MEDIA_TYPE)
+    if fmt == "raw":
+        values = np.array(
+            [np.nan if p is None else p for p, _ in results], dtype="<f8"
+        )
+        nb_errors = sum(1 for _, error in results if error)
+        return Response(
+            values.tobytes(),
+            media_type=f"{RAW_MEDIA_TYPE}; dtype=float64",
+            headers={"X-Prediction-Errors": str(nb_errors)},
+        )
+    return None
@@ -0,0 +1,46 @@
+from typing import Any, List, Optional, Sequence, Tuple
+import numpy as np
+from api.ml.registry import registry
+
+EMPTY_VECTOR_ERROR = "La liste de données ne peut pas être vide."
+NON_FINITE_ERROR = "La prédiction n'est pas un nombre fini."
+WIDTH_ERROR = "Le modèle attend des vecteurs de {} valeurs."
+
+PredictionResult = Tuple[Optional[float], Optional[str]]
+
+
+def predict_batch(
+    vectors: Sequence[Sequence[float]], model: Optional[Any] = None
+) -> List[PredictionResult]:
+    """
+    Calcule en un seul appel vectorisé du modèle (par défaut le modèle actif
+    du registre) les prédictions d'un lot de vecteurs, éventuellement de
+    tailles différentes. Renvoie, dans l'ordre du lot, un couple
+    (prédiction, erreur) par vecteur : une entrée invalide ne fait pas
+    échouer le reste du lot.
+    """
+    model = model or registry.current()
+    results: List[PredictionResult] = [(None, EMPTY_VECTOR_ERROR)] * len(
+        vectors
+    )
+    # Largeur imposée par le modèle (None : toutes les tailles acceptées)
+    width = getattr(model, "n_features", None)
+    valid = []
+    for index, vector in enumerate(vectors):
+        if width is not None and len(vector) and len(vector) != width:
+            results[index] = (None, WIDTH_ERROR.format(width))
+        elif len(vector):
+            valid.append(index)
+    if not valid:
+        return results
+
+    predictions = model.predict(
+        [np.asarray(vectors[i], dtype=np.float64) for i in valid]
+    )
+    predictions = np.asarray(predictions, dtype=np.float64)
+    finite = np.isfinite(predictions)
+    for index, prediction, ok in zip(
+        valid, predictions.tolist(), finite.tolist()
+    ):
+        results[index] = (prediction, None) if ok else (None, NON_FINITE_ERROR)
+    return results
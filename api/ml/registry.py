@@ -0,0 +1,242 @@
+import asyncio
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+import numpy as np
+from api.utils.logger import logger
+
+MODEL_NAME = os.getenv("MODEL_NAME")
+MODEL_VERSION = os.getenv("MODEL_VERSION", "latest")
+MODEL_SOURCE = os.getenv("MODEL_SOURCE", "mlflow")
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+MODEL_CACHE_MAX_BYTES = int(
+    os.getenv("MODEL_CACHE_MAX_BYTES", str(512 * 1024 * 1024))
+)
+MODEL_WARMUP_SIZE = int(os.getenv("MODEL_WARMUP_SIZE", "1"))
+
+MODEL_SOURCES = ("mlflow", "local", "builtin")
+
+
+class MeanModel:
+    """Modèle intégré : moyenne de chaque vecteur (comportement historique)."""
+
+    def predict(self, vectors: Sequence[np.ndarray]) -> np.ndarray:
+        lengths = np.fromiter((len(v) for v in vectors), dtype=np.int64)
+        values = np.concatenate(vectors)
+        starts = np.zeros(len(lengths), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=starts[1:])
+        with np.errstate(over="ignore", invalid="ignore"):
+            return np.add.reduceat(values, starts) / lengths
+
+
+def expected_width(model: Any) -> Optional[int]:
+    """
+    Nombre de valeurs attendu par vecteur : `n_features_in_` d'un
+    estimateur scikit-learn ou entrées de la signature d'un pyfunc MLflow.
+    None si le modèle ne l'indique pas.
+    """
+    width = getattr(model, "n_features_in_", None)
+    if width is not None:
+        return int(width)
+    metadata = getattr(model, "metadata", None)
+    schema = metadata.get_input_schema() if metadata is not None else None
+    if schema is None:
+        return None
+    if schema.is_tensor_spec():
+        shape = schema.inputs[0].shape
+        return int(shape[-1]) if len(shape) > 1 and shape[-1] > 0 else None
+    return len(schema.inputs)
+
+
+class VectorModel:
+    """
+    Adapte un modèle tabulaire (pyfunc MLflow, estimateur scikit-learn...)
+    au contrat `predict(vecteurs) -> np.ndarray` : les vecteurs sont
+    regroupés par taille pour un appel `predict` en 2D par groupe. Un
+    groupe dont la taille n'est pas celle attendue par le modèle reçoit NaN
+    sans faire échouer les autres.
+    """
+
+    def __init__(self, inner: Any):
+        self.inner = inner
+        self.n_features = expected_width(inner)
+
+    def predict(self, vectors: Sequence[np.ndarray]) -> np.ndarray:
+        predictions = np.full(len(vectors), np.nan, dtype=np.float64)
+        groups: Dict[int, List[int]] = {}
+        for index, vector in enumerate(vectors):
+            groups.setdefault(len(vector), []).append(index)
+        for width, indexes in groups.items():
+            if self.n_features is not None and width != self.n_features:
+                continue
+            matrix = np.vstack([vectors[i] for i in indexes])
+            output = np.asarray(self.inner.predict(matrix), dtype=np.float64)
+            predictions[indexes] = output.reshape(len(indexes), -1)[:, 0]
+        return predictions
+
+
+@dataclass
+class LoadedModel:
+    name: str
+    version: str
+    source: str
+    model: Any
+    size_bytes: int
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return (self.source, self.name, self.version)
+
+    def key_spec(self) -> Tuple[str, str, str]:
+        """Arguments de `load_model` permettant de recharger ce modèle."""
+        return (self.name, self.version, self.source)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "version": self.version,
+            "source": self.source,
+            "size_bytes": self.size_bytes,
+        }
+
+
+BUILTIN_MODEL = LoadedModel("mean", "builtin", "builtin", MeanModel(), 0)
+
+
+def _directory_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, f))
+        for root, _, files in os.walk(path)
+        for f in files
+    )
+
+
+def _load_from_mlflow(name: str, version: str) -> Tuple[Any, int]:
+    import mlflow
+
+    uri = f"models:/{name}/{version}"
+    local_path = mlflow.artifacts.download_artifacts(artifact_uri=uri)
+    model = mlflow.pyfunc.load_model(local_path)
+    return VectorModel(model), _directory_size(local_path)
+
+
+def _load_from_directory(name: str, version: str) -> Tuple[Any, int]:
+    import joblib
+
+    base = os.path.join(MODEL_DIR, name, version)
+    for filename in ("model.joblib", "model.pkl"):
+        path = os.path.join(base, filename)
+        if os.path.exists(path):
+            return VectorModel(joblib.load(path)), os.path.getsize(path)
+    raise FileNotFoundError(f"Aucun modèle trouvé dans {base}")
+
+
+def load_model(name: str, version: str, source: str) -> Tuple[Any, int]:
+    """Charge un modèle et estime sa taille (appel bloquant)."""
+    if source == "builtin":
+        return MeanModel(), 0
+    if source == "mlflow":
+        return _load_from_mlflow(name, version)
+    if source == "local":
+        return _load_from_directory(name, version)
+    raise ValueError(f"Source de modèle inconnue : {source}")
+
+
+class ModelRegistry:
+    """
+    Cache en mémoire des modèles chargés (LRU borné par un budget mémoire)
+    et modèle actif servi par /predict. Les chargements se font dans un
+    thread, hors du chemin des requêtes ; le nouveau modèle n'est publié
+    qu'après un appel de préchauffage, par simple remplacement de référence.
+    """
+
+    def __init__(self, max_bytes: int = MODEL_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._cache: "OrderedDict[Tuple[str, str, str], LoadedModel]" = (
+            OrderedDict()
+        )
+        self._active: LoadedModel = BUILTIN_MODEL
+        self._lock = asyncio.Lock()
+        self._listeners: List[Callable[[LoadedModel], Awaitable[None]]] = []
+
+    @property
+    def active(self) -> LoadedModel:
+        return self._active
+
+    def current(self) -> Any:
+        return self._active.model
+
+    def cached(self) -> List[Dict[str, Any]]:
+        return [m.describe() for m in self._cache.values()]
+
+    def subscribe(
+        self, listener: Callable[[LoadedModel], Awaitable[None]]
+    ) -> None:
+        """Appelle `listener` avant chaque publication d'un nouveau modèle."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    async def activate(
+        self, name: str, version: str, source: str = MODEL_SOURCE
+    ) -> LoadedModel:
+        """Charge (ou reprend du cache), préchauffe puis publie un modèle."""
+        if source not in MODEL_SOURCES:
+            raise ValueError(f"Source de modèle inconnue : {source}")
+        async with self._lock:
+            key = (source, name, version)
+            loaded = self._cache.get(key)
+            if source == "builtin":
+                loaded = BUILTIN_MODEL
+            elif loaded is None:
+                logger.info(
+                    f"Chargement du modèle {name}:{version} ({source})"
+                )
+                model, size_bytes = await asyncio.to_thread(
+                    load_model, name, version, source
+                )
+                loaded = LoadedModel(name, version, source, model, size_bytes)
+            await asyncio.to_thread(self._warm_up, loaded)
+            for listener in self._listeners:
+                await listener(loaded)
+            if loaded is not BUILTIN_MODEL:
+                self._cache[key] = loaded
+                self._cache.move_to_end(key)
+            self._active = loaded
+            self._evict()
+        logger.success(f"Modèle actif : {name}:{version} ({source})")
+        return loaded
+
+    def _warm_up(self, loaded: LoadedModel) -> None:
+        # Largeur du modèle si connue : un modèle à largeur fixe refuserait
+        # un vecteur de MODEL_WARMUP_SIZE valeurs
+        width = getattr(loaded.model, "n_features", None) or MODEL_WARMUP_SIZE
+        sample = [np.zeros(width, dtype=np.float64)]
+        loaded.model.predict(sample)
+
+    def _evict(self) -> None:
+        total = sum(m.size_bytes for m in self._cache.values())
+        for key in list(self._cache):
+            if total <= self.max_bytes:
+                break
+            if key == self._active.key:
+                continue
+            evicted = self._cache.pop(key)
+            total -= evicted.size_bytes
+            logger.info(
+                f"Modèle évincé du cache : {evicted.name}:{evicted.version}"
+            )
+
+
+registry = ModelRegistry()
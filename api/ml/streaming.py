@@ -0,0 +1,77 @@
+import json
+import time
+from typing import Any, AsyncIterator, Dict
+from fastapi import Request
+from prometheus_client import Counter, Histogram
+from api.ml.executor import executor
+from api.ml.generation import iter_tokens
+from api.utils.logger import logger
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+GENERATE_TTFT = Histogram(
+    "generate_time_to_first_token_seconds",
+    "Délai entre la requête /generate/stream et le premier token envoyé",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+GENERATE_TOKENS_PER_SECOND = Histogram(
+    "generate_tokens_per_second",
+    "Débit de tokens d'un flux /generate/stream",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000),
+)
+GENERATE_DISCONNECTS = Counter(
+    "generate_stream_disconnects_total",
+    "Flux /generate/stream interrompus par la déconnexion du client",
+)
+
+
+def negotiate_stream_format(accept: str) -> str:
+    """Server-Sent Events si le client les demande, NDJSON sinon."""
+    return SSE_MEDIA_TYPE if SSE_MEDIA_TYPE in accept else NDJSON_MEDIA_TYPE
+
+
+def encode_event(payload: Dict[str, Any], media_type: str, event: str) -> str:
+    data = json.dumps(payload, ensure_ascii=False)
+    if media_type == SSE_MEDIA_TYPE:
+        return f"event: {event}\ndata: {data}\n\n"
+    return f"{data}\n"
+
+
+async def stream_generation(
+    request: Request, prompt: str, media_type: str
+) -> AsyncIterator[str]:
+    """
+    Diffuse les tokens au fil de leur calcul et arrête la génération dès que
+    le client se déconnecte, pour ne pas gaspiller de calcul.
+    """
+    started = time.perf_counter()
+    first_token_at = None
+    nb_tokens = 0
+    disconnected = False
+    tokens = executor.stream(iter_tokens, prompt)
+    try:
+        async for token in tokens:
+            if await request.is_disconnected():
+                disconnected = True
+                break
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+                GENERATE_TTFT.observe(first_token_at - started)
+            nb_tokens += 1
+            yield encode_event({"token": token}, media_type, "token")
+        else:
+            yield encode_event(
+                {"done": True, "tokens": nb_tokens}, media_type, "done"
+            )
+    finally:
+        await tokens.aclose()
+        if first_token_at is not None:
+            elapsed = time.perf_counter() - first_token_at
+            if elapsed > 0:
+                GENERATE_TOKENS_PER_SECOND.observe(nb_tokens / elapsed)
+        if disconnected:
+            GENERATE_DISCONNECTS.inc()
+            logger.info(
+                f"Client déconnecté, génération interrompue après {nb_tokens} tokens"
+            )
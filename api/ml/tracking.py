@@ -0,0 +1,243 @@
+import json
+import os
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Protocol
+from prometheus_client import Counter
+from api.utils.logger import logger
+
+MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://mlflow:5000")
+MLFLOW_EXPERIMENT_ID = os.getenv("MLFLOW_EXPERIMENT_ID", "0")
+MLFLOW_LOCAL_STORE = os.getenv("MLFLOW_LOCAL_STORE")
+MLFLOW_QUEUE_SIZE = int(os.getenv("MLFLOW_QUEUE_SIZE", "10000"))
+MLFLOW_FLUSH_BATCH_SIZE = int(os.getenv("MLFLOW_FLUSH_BATCH_SIZE", "100"))
+MLFLOW_FLUSH_INTERVAL = float(os.getenv("MLFLOW_FLUSH_INTERVAL", "1.0"))
+MLFLOW_FLUSH_TIMEOUT = float(os.getenv("MLFLOW_FLUSH_TIMEOUT", "2.0"))
+MLFLOW_SPILL_PATH = os.getenv("MLFLOW_SPILL_PATH")
+
+TRACKING_EVENTS = Counter(
+    "mlflow_tracking_events_total",
+    "Événements MLflow traités par le journal write-behind",
+    ["outcome"],
+)
+
+
+@dataclass
+class TrackingEvent:
+    run_name: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    metrics: Dict[str, float] = field(default_factory=dict)
+    timestamp_ms: int = field(default_factory=lambda: int(time.time() * 1000))
+
+
+class TrackingSink(Protocol):
+    def write(self, events: List[TrackingEvent]) -> None: ...
+
+
+class MlflowSink:
+    """
+    Écrit chaque événement comme un run MLflow, avec un seul appel
+    `log_batch` pour l'ensemble de ses paramètres et métriques.
+    """
+
+    def __init__(
+        self,
+        tracking_uri: str = MLFLOW_TRACKING_URI,
+        experiment_id: str = MLFLOW_EXPERIMENT_ID,
+    ):
+        self.tracking_uri = tracking_uri
+        self.experiment_id = experiment_id
+        self._client = None
+
+    def write(self, events: List[TrackingEvent]) -> None:
+        from mlflow.entities import Metric, Param
+        from mlflow.tracking import MlflowClient
+
+        if self._client is None:
+            self._client = MlflowClient(tracking_uri=self.tracking_uri)
+        for event in events:
+            run = self._client.create_run(
+                self.experiment_id,
+                start_time=event.timestamp_ms,
+                run_name=event.run_name,
+            )
+            self._client.log_batch(
+                run.info.run_id,
+                metrics=[
+                    Metric(key, float(value), event.timestamp_ms, 0)
+                    for key, value in event.metrics.items()
+                ],
+                params=[
+                    Param(key, str(value))
+                    for key, value in event.params.items()
+                ],
+            )
+            self._client.set_terminated(run.info.run_id)
+
+
+class LocalFileSink:
+    """
+    Substitut local du serveur MLflow : ajoute les événements dans un
+    fichier JSON Lines (tests, développement hors Docker).
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+
+    def write(self, events: List[TrackingEvent]) -> None:
+        lines = "".join(json.dumps(asdict(e)) + "\n" for e in events)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    def read(self) -> List[TrackingEvent]:
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, encoding="utf-8") as f:
+            return [TrackingEvent(**json.loads(line)) for line in f if line]
+
+
+class WriteBehindTracker:
+    """
+    Journal MLflow non bloquant : les handlers déposent leurs événements dans
+    une file bornée, vidée par lots depuis un thread dédié. Quand la file est
+    pleine, l'événement est déversé sur disque (`spill_path`) ou abandonné.
+    """
+
+    def __init__(
+        self,
+        sink: TrackingSink,
+        max_queue_size: int = MLFLOW_QUEUE_SIZE,
+        batch_size: int = MLFLOW_FLUSH_BATCH_SIZE,
+        flush_interval: float = MLFLOW_FLUSH_INTERVAL,
+        spill_path: Optional[str] = MLFLOW_SPILL_PATH,
+    ):
+        self.sink = sink
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.spill_path = os.path.abspath(spill_path) if spill_path else None
+        self._queue: "queue.Queue[Optional[TrackingEvent]]" = queue.Queue(
+            maxsize=max_queue_size
+        )
+        self._spill_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def log_run(
+        self,
+        run_name: str,
+        params: Optional[Dict[str, Any]] = None,
+        metrics: Optional[Dict[str, float]] = None,
+    ) -> bool:
+        """Enregistre un run sans bloquer ; renvoie False s'il est écarté."""
+        event = TrackingEvent(run_name, params or {}, metrics or {})
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            if self.spill_path:
+                self._spill([event])
+                TRACKING_EVENTS.labels(outcome="spilled").inc()
+            else:
+                TRACKING_EVENTS.labels(outcome="dropped").inc()
+                logger.warning(
+                    f"File MLflow pleine, événement '{run_name}' abandonné"
+                )
+            return False
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="mlflow-write-behind", daemon=True
+        )
+        self._thread.start()
+        logger.info("Journal MLflow write-behind démarré")
+
+    def stop(self, timeout: float = MLFLOW_FLUSH_TIMEOUT) -> None:
+        """Vide la file puis arrête le thread (au plus `timeout` secondes)."""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(
+                f"Journal MLflow non vidé après {timeout}s "
+                f"({self._queue.qsize()} événements en attente)"
+            )
+        self._thread = None
+        logger.info("Journal MLflow write-behind arrêté")
+
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._stop_event.is_set():
+                    return
+                self._replay_spill()
+                continue
+            batch = [first] if first is not None else []
+            while len(batch) < self.batch_size:
+                try:
+                    event = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if event is not None:
+                    batch.append(event)
+            if batch:
+                self._write(batch)
+            if self._stop_event.is_set() and self._queue.empty():
+                return
+
+    def _write(self, batch: List[TrackingEvent]) -> None:
+        try:
+            self.sink.write(batch)
+            TRACKING_EVENTS.labels(outcome="flushed").inc(len(batch))
+        except Exception as e:
+            logger.warning(f"Échec de l'écriture MLflow ({len(batch)}) : {e}")
+            if self.spill_path:
+                self._spill(batch)
+                TRACKING_EVENTS.labels(outcome="spilled").inc(len(batch))
+            else:
+                TRACKING_EVENTS.labels(outcome="failed").inc(len(batch))
+
+    def _spill(self, events: List[TrackingEvent]) -> None:
+        lines = "".join(json.dumps(asdict(e)) + "\n" for e in events)
+        with self._spill_lock:
+            os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+    def _replay_spill(self) -> None:
+        """Réinjecte les événements déversés sur disque quand la file est vide."""
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        replay_path = f"{self.spill_path}.replay"
+        with self._spill_lock:
+            os.replace(self.spill_path, replay_path)
+        with open(replay_path, encoding="utf-8") as f:
+            events = [TrackingEvent(**json.loads(line)) for line in f if line]
+        os.remove(replay_path)
+        logger.info(f"Rejeu de {len(events)} événements MLflow déversés")
+        for start in range(0, len(events), self.batch_size):
+            self._write(events[start : start + self.batch_size])
+
+
+def _build_sink() -> TrackingSink:
+    if MLFLOW_LOCAL_STORE:
+        return LocalFileSink(MLFLOW_LOCAL_STORE)
+    return MlflowSink()
+
+
+tracker = WriteBehindTracker(_build_sink())
@@ -0,0 +1,27 @@
+import os
+import time
+from typing import Callable, Dict
+
+RETRAIN_EPOCHS = int(os.getenv("RETRAIN_EPOCHS", "10"))
+RETRAIN_EPOCH_SECONDS = float(os.getenv("RETRAIN_EPOCH_SECONDS", "1.0"))
+
+
+class RetrainCancelled(Exception):
+    pass
+
+
+def run_retrain(
+    report: Callable[[float, str], None], should_stop: Callable[[], bool]
+) -> Dict[str, float]:
+    """
+    Entraînement (simulé) du modèle, exécuté dans un processus worker.
+    `report` publie l'avancement, `should_stop` signale une annulation.
+    """
+    loss = 1.0
+    for epoch in range(1, RETRAIN_EPOCHS + 1):
+        if should_stop():
+            raise RetrainCancelled(f"Annulé à l'epoch {epoch}")
+        time.sleep(RETRAIN_EPOCH_SECONDS)
+        loss *= 0.8
+        report(epoch / RETRAIN_EPOCHS, f"Epoch {epoch}/{RETRAIN_EPOCHS}")
+    return {"epochs": RETRAIN_EPOCHS, "loss": loss}
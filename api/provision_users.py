@@ -0,0 +1,65 @@
+"""
+Provisionnement en masse d'utilisateurs depuis un fichier CSV (en-tête
+username,email,password[,bio,role]), NDJSON ou JSON (liste d'objets).
+
+Usage : python -m api.provision_users utilisateurs.csv [--batch-size 500]
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+from typing import Any, Dict, List
+from dotenv import load_dotenv
+from api.db.provisioning import (
+    PROVISIONING_BATCH_SIZE,
+    provision_users,
+    provisioning_hasher,
+)
+from api.db.session import SessionLocal
+from api.utils.logger import logger
+
+load_dotenv()
+
+
+def read_records(path: str) -> List[Dict[str, Any]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            # Colonnes vides : valeur par défaut du schéma (bio, rôle)
+            return [
+                {key: value for key, value in row.items() if value}
+                for row in csv.DictReader(f)
+            ]
+        if path.endswith(".json"):
+            return json.load(f)
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def main(args: argparse.Namespace) -> int:
+    records = read_records(args.path)
+    logger.info(f"Provisionnement de {len(records)} utilisateurs")
+    provisioning_hasher.start()
+    try:
+        async with SessionLocal() as db:
+            result = await provision_users(db, records, args.batch_size)
+    finally:
+        provisioning_hasher.shutdown()
+    for failure in result.failed:
+        print(f"ligne {failure.row} ({failure.username}) : {failure.error}")
+    print(
+        f"{result.created} créés, {len(result.failed)} échecs en "
+        f"{result.duration_seconds:.1f}s ({result.rows_per_second:.0f} "
+        "lignes/s)"
+    )
+    return 1 if result.failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Crée des utilisateurs en masse depuis un fichier."
+    )
+    parser.add_argument("path", help="fichier .csv, .ndjson ou .json")
+    parser.add_argument(
+        "--batch-size", type=int, default=PROVISIONING_BATCH_SIZE
+    )
+    raise SystemExit(asyncio.run(main(parser.parse_args())))
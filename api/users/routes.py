@@ -1,19 +1,28 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Header, Request
+from fastapi import APIRouter, HTTPException, Depends, status, Header
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import or_
 from sqlalchemy.future import select
-from typing import AsyncGenerator
+from typing import Optional
+from jose import JWTError
 
-from api.db.session import SessionLocal
-from api.db.schemas import UserCreate, UserOut, UserLogin
+from api.db.session import get_db
+from api.db.schemas import LogoutRequest, UserCreate, UserOut, UserLogin
 from api.db.services import (
     create_user,
     authenticate_user,
-    get_user_by_username,
+    store_refresh_token,
 )
 from api.db.models import User, UserSensitiveData
 from api.core.crypto import encrypt_sensitive_data, decrypt_sensitive_data
-from api.core.tokens import create_access_token
+from api.core.ratelimit import auth_admission
+from api.core.identity import UserIdentity, user_identities
+from api.core.hashing import PasswordHashingUnavailable
+from api.core.revocation import revocations
+from api.core.tokens import (
+    create_access_token,
+    decode_token,
+    hash_refresh_token,
+)
 from api.utils.logger import logger
 import os
 from datetime import timedelta
@@ -21,24 +30,11 @@ from datetime import timedelta
 router = APIRouter()
 
 
-async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
-    async with SessionLocal() as session:
-        request.state.db = session
-        try:
-            yield session
-            await session.commit()
-        except Exception:
-            await session.rollback()
-            logger.exception("Erreur lors de la gestion de la session DB")
-            raise
-        finally:
-            await session.close()
-
-
 async def get_current_user(
-    db: AsyncSession = Depends(get_db), x_user: str = Header(...)
-) -> User:
-    user = await get_user_by_username(db, x_user)
+    db: AsyncSession = Depends(get_db, scope="function"),
+    x_user: str = Header(...),
+) -> UserIdentity:
+    user = await user_identities.get(db, x_user)
     if not user:
         logger.warning(
             f"Échec d'authentification de l'utilisateur via header : {x_user}"
@@ -50,10 +46,24 @@ async def get_current_user(
     return user
 
 
+def hashing_unavailable(error: PasswordHashingUnavailable) -> HTTPException:
+    logger.warning(f"Service d'authentification surchargé : {error}")
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service overloaded, retry later",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post(
-    "/register", response_model=UserOut, status_code=status.HTTP_201_CREATED
+    "/register",
+    response_model=UserOut,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(auth_admission("register", uses_hashing=True))],
 )
-async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
+async def register_user(
+    user: UserCreate, db: AsyncSession = Depends(get_db, scope="function")
+):
     exists = await db.execute(
         select(User).where(
             or_(User.username == user.username, User.email == user.email)
@@ -67,7 +77,12 @@ async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username or email already registered",
         )
-    new_user = await create_user(db, user.username, user.email, user.password)
+    try:
+        new_user = await create_user(
+            db, user.username, user.email, user.password
+        )
+    except PasswordHashingUnavailable as e:
+        raise hashing_unavailable(e)
     encrypted_bio = encrypt_sensitive_data(
         user.bio or "", new_user.encryption_key
     )
@@ -87,9 +102,17 @@ async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     )
 
 
-@router.post("/login")
-async def login(user: UserLogin, db: AsyncSession = Depends(get_db)):
-    db_user = await authenticate_user(db, user.username, user.password)
+@router.post(
+    "/login",
+    dependencies=[Depends(auth_admission("login", uses_hashing=True))],
+)
+async def login(
+    user: UserLogin, db: AsyncSession = Depends(get_db, scope="function")
+):
+    try:
+        db_user = await authenticate_user(db, user.username, user.password)
+    except PasswordHashingUnavailable as e:
+        raise hashing_unavailable(e)
     if not db_user:
         logger.warning(f"Échec de login pour {user.username}")
         raise HTTPException(
@@ -120,25 +143,10 @@ async def login(user: UserLogin, db: AsyncSession = Depends(get_db)):
         },
         expires_delta=refresh_delta,
     )
-    encrypted_rt = encrypt_sensitive_data(
-        refresh_token, db_user.encryption_key
-    )
-    if db_user.sensitive_data:
-        db_user.sensitive_data.encrypted_refresh_token = encrypted_rt
-    else:
-        sd = UserSensitiveData(
-            user_id=db_user.id,
-            encrypted_bio="",
-            encrypted_refresh_token=encrypted_rt,
-        )
-        db.add(sd)
-    logger.debug(f"LOGIN: refresh_token = {repr(refresh_token)}")
-    logger.debug(f"LOGIN: encrypted_rt = {repr(encrypted_rt)}")
-    logger.debug(
-        f"LOGIN: db_user.encryption_key = {repr(db_user.encryption_key)}"
+    await store_refresh_token(
+        db, db_user.id, hash_refresh_token(refresh_token)
     )
     await db.commit()
-    await db.refresh(db_user)
     logger.info(f"Utilisateur connecté : {db_user.username}")
     return {
         "access_token": access_token,
@@ -150,18 +158,50 @@ async def login(user: UserLogin, db: AsyncSession = Depends(get_db)):
 
 
 @router.post("/logout")
-async def logout():
-    logger.info("Déconnexion utilisateur (endpoint appelé)")
-    return {"message": "Logout successful"}
+async def logout(
+    request: Optional[LogoutRequest] = None,
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db, scope="function"),
+):
+    """
+    Révoque le token d'accès (en-tête Authorization) et, s'il est fourni,
+    le refresh token : ils sont refusés jusqu'à leur expiration.
+    """
+    tokens = []
+    if authorization and authorization.lower().startswith("bearer "):
+        tokens.append(authorization[len("bearer ") :].strip())
+    if request and request.refresh_token:
+        tokens.append(request.refresh_token.strip())
+    nb_revoked = 0
+    for token in tokens:
+        try:
+            payload = decode_token(token)
+        except JWTError:
+            continue
+        if payload.get("jti") and payload.get("exp"):
+            await revocations.revoke(
+                db, payload["jti"], payload["exp"], payload.get("sub")
+            )
+            nb_revoked += 1
+    logger.info(f"Déconnexion utilisateur ({nb_revoked} tokens révoqués)")
+    return {"message": "Logout successful", "revoked": nb_revoked}
 
 
 @router.get("/profile", response_model=UserOut)
-async def get_profile(current_user: User = Depends(get_current_user)):
+async def get_profile(
+    current_user: UserIdentity = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db, scope="function"),
+):
+    result = await db.execute(
+        select(UserSensitiveData.encrypted_bio).where(
+            UserSensitiveData.user_id == current_user.id
+        )
+    )
+    encrypted_bio = result.scalar()
     bio = None
-    if current_user.sensitive_data:
+    if encrypted_bio is not None:
         bio = decrypt_sensitive_data(
-            current_user.sensitive_data.encrypted_bio,
-            current_user.encryption_key,
+            encrypted_bio, current_user.encryption_key
         )
     logger.info(
         f"Consultation du profil utilisateur : {current_user.username}"
@@ -0,0 +1,121 @@
+"""
+Benchmark du chemin base de données de /users/login : ancien chemin (ORM
+complet + selectinload, mutation ou insertion, commit puis refresh) contre
+le nouveau (lecture des seules colonnes d'authentification puis upsert).
+La vérification bcrypt, identique dans les deux cas, est exclue.
+
+Usage : python -m tests.bench_login [--users 50] [--logins 2000]
+        [--concurrency 10]
+Nécessite DATABASE_URL (postgresql://...).
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from uuid import uuid4
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload, sessionmaker
+from api.core.tokens import hash_refresh_token
+from api.db.models import Base, User, UserSensitiveData
+from api.db.services import get_user_credentials, store_refresh_token
+from tests.utils.logger import logger
+
+
+async def legacy_login(db: AsyncSession, username: str) -> None:
+    result = await db.execute(
+        select(User)
+        .options(selectinload(User.sensitive_data))
+        .where(User.username == username)
+    )
+    user = result.scalars().first()
+    token_hash = hash_refresh_token(str(uuid4()))
+    if user.sensitive_data:
+        user.sensitive_data.refresh_token_hash = token_hash
+    else:
+        db.add(
+            UserSensitiveData(
+                user_id=user.id,
+                encrypted_bio="",
+                refresh_token_hash=token_hash,
+            )
+        )
+    await db.commit()
+    await db.refresh(user)
+
+
+async def upsert_login(db: AsyncSession, username: str) -> None:
+    user = await get_user_credentials(db, username)
+    await store_refresh_token(db, user.id, hash_refresh_token(str(uuid4())))
+    await db.commit()
+
+
+async def run(session_factory, login, usernames, nb_logins, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore, session_factory() as db:
+            await login(db, usernames[i % len(usernames)])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(nb_logins)))
+    return nb_logins / (time.perf_counter() - started)
+
+
+async def main(args: argparse.Namespace) -> None:
+    url = os.environ["DATABASE_URL"].replace(
+        "postgresql://", "postgresql+asyncpg://"
+    )
+    engine = create_async_engine(url, pool_size=args.concurrency)
+    session_factory = sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    prefix = f"bench_{uuid4().hex[:8]}"
+    usernames = [f"{prefix}_{i}" for i in range(args.users)]
+    async with session_factory() as db:
+        db.add_all(
+            User(
+                username=name,
+                email=f"{name}@example.com",
+                hashed_password="x",
+                encryption_key=f"{name}-key",
+            )
+            for name in usernames
+        )
+        await db.commit()
+    try:
+        for label, login in (("avant", legacy_login), ("après", upsert_login)):
+            # Un premier passage crée les lignes user_sensitive_data
+            await run(session_factory, login, usernames, args.users, 1)
+            rate = await run(
+                session_factory,
+                login,
+                usernames,
+                args.logins,
+                args.concurrency,
+            )
+            logger.info(f"Login {label} : {rate:.0f} logins/s")
+            print(f"{label:>6} : {rate:8.0f} logins/s")
+    finally:
+        async with session_factory() as db:
+            users = select(User.id).where(User.username.like(f"{prefix}_%"))
+            for model, column in (
+                (UserSensitiveData, UserSensitiveData.user_id),
+                (User, User.id),
+            ):
+                await db.execute(
+                    model.__table__.delete().where(column.in_(users))
+                )
+            await db.commit()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--logins", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
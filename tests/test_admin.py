@@ -1,7 +1,11 @@
+import json
 import pytest
 import pytest_asyncio
+import api.db.provisioning as provisioning
 from uuid import uuid4
 from api.core.crypto import generate_user_key
+from api.core.hashing import PasswordHashingUnavailable
+from api.db.provisioning import HASHING_UNAVAILABLE_ERROR, provision_users
 from api.db.services import create_user
 from tests.utils.logger import logger
 
@@ -62,3 +66,217 @@ async def test_delete_user(async_client, admin_user, normal_user):
     logger.info(
         f"Suppression de l'utilisateur {normal_user.username} vérifiée par l'admin {admin_user.username}"
     )
+
+
+@pytest.mark.asyncio
+async def test_inspect_and_purge_prompt_cache(async_client, admin_user):
+    logger.info("Début du test: test_inspect_and_purge_prompt_cache")
+    headers = {"X-User": admin_user.username}
+    await async_client.post("/generate", json={"prompt": "cache test"})
+    resp = await async_client.get("/admin/prompt-cache", headers=headers)
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["stats"]["entries"] >= 1
+    resp2 = await async_client.delete("/admin/prompt-cache", headers=headers)
+    assert resp2.status_code == 200, resp2.text
+    assert resp2.json()["purged"] >= 1
+    logger.info("Inspection et purge du cache de prompts vérifiées")
+    logger.success("Fin du test: test_inspect_and_purge_prompt_cache")
+
+
+@pytest.mark.asyncio
+async def test_list_users_keyset_pagination(
+    async_client, admin_user, normal_user
+):
+    logger.info("Début du test: test_list_users_keyset_pagination")
+    headers = {"X-User": admin_user.username}
+    resp = await async_client.get(
+        "/admin/users", params={"limit": 1}, headers=headers
+    )
+    assert resp.status_code == 200, resp.text
+    assert len(resp.json()) == 1
+    assert "hashed_password" not in resp.json()[0]
+    cursor = resp.headers["X-Next-Cursor"]
+    resp2 = await async_client.get(
+        "/admin/users",
+        params={"limit": 1000, "after_id": cursor},
+        headers=headers,
+    )
+    assert all(u["id"] > int(cursor) for u in resp2.json())
+    assert "X-Next-Cursor" not in resp2.headers
+    resp3 = await async_client.get(
+        "/admin/users", params={"role": "admin"}, headers=headers
+    )
+    assert {u["role"] for u in resp3.json()} == {"admin"}
+    logger.success("Fin du test: test_list_users_keyset_pagination")
+
+
+@pytest.mark.asyncio
+async def test_list_users_accepts_timezone_aware_dates(
+    async_client, admin_user
+):
+    logger.info("Début du test: test_list_users_accepts_timezone_aware_dates")
+    headers = {"X-User": admin_user.username}
+    resp = await async_client.get(
+        "/admin/users",
+        params={"created_after": "2000-01-01T00:00:00Z", "limit": 1000},
+        headers=headers,
+    )
+    assert resp.status_code == 200, resp.text
+    assert resp.json()
+    resp = await async_client.get(
+        "/admin/users",
+        params={"created_before": "2000-01-01T02:00:00+02:00"},
+        headers=headers,
+    )
+    assert resp.status_code == 200, resp.text
+    assert resp.json() == []
+    logger.success("Fin du test: test_list_users_accepts_timezone_aware_dates")
+
+
+@pytest.mark.asyncio
+async def test_export_users_streams_csv_and_ndjson(
+    async_client, admin_user, normal_user
+):
+    logger.info("Début du test: test_export_users_streams_csv_and_ndjson")
+    headers = {"X-User": admin_user.username}
+    resp = await async_client.get(
+        "/admin/users/export", params={"format": "ndjson"}, headers=headers
+    )
+    assert resp.status_code == 200, resp.text
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    usernames = {row["username"] for row in rows}
+    assert {admin_user.username, normal_user.username} <= usernames
+    assert all("bio" not in row for row in rows)
+    resp2 = await async_client.get(
+        "/admin/users/export",
+        params={"format": "csv", "decrypt_bio": "true"},
+        headers=headers,
+    )
+    assert resp2.status_code == 200, resp2.text
+    lines = resp2.text.splitlines()
+    assert lines[0] == "id,username,email,role,created_at,bio"
+    assert len(lines) == len(rows) + 1
+    logger.success("Fin du test: test_export_users_streams_csv_and_ndjson")
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_users_reports_failures(async_client, admin_user):
+    logger.info("Début du test: test_bulk_create_users_reports_failures")
+    unique = str(uuid4())[:8]
+    users = [
+        {
+            "username": f"bulk{i}_{unique}",
+            "email": f"bulk{i}_{unique}@example.com",
+            "password": "BulkPass!23",
+            "bio": f"Bio {i}",
+        }
+        for i in range(5)
+    ]
+    users.append(dict(users[0], email=f"other_{unique}@example.com"))
+    users.append({"username": admin_user.username, "email": "x@y.z"})
+    resp = await async_client.post(
+        "/admin/users/bulk",
+        json={"users": users},
+        headers={"X-User": admin_user.username},
+    )
+    assert resp.status_code == 200, resp.text
+    result = resp.json()
+    assert result["created"] == 5
+    assert [failure["row"] for failure in result["failed"]] == [5, 6]
+    login = await async_client.post(
+        "/users/login",
+        json={"username": users[2]["username"], "password": "BulkPass!23"},
+    )
+    assert login.status_code == 200, login.text
+    logger.success("Fin du test: test_bulk_create_users_reports_failures")
+
+
+@pytest.mark.asyncio
+async def test_provision_users_reports_non_string_username(db_session):
+    logger.info(
+        "Début du test: test_provision_users_reports_non_string_username"
+    )
+    unique = str(uuid4())[:8]
+    records = [
+        {
+            "username": f"num{i}_{unique}",
+            "email": f"num{i}_{unique}@example.com",
+            "password": "BulkPass!23",
+        }
+        for i in range(2)
+    ]
+    # Après un lot déjà validé : la ligne invalide ne doit pas tout arrêter
+    records.append(
+        {"username": 12345, "email": "n@example.com", "password": "x"}
+    )
+    result = await provision_users(db_session, records, batch_size=2)
+    assert result.created == 2
+    assert [(f.row, f.username) for f in result.failed] == [(2, "12345")]
+    logger.success(
+        "Fin du test: test_provision_users_reports_non_string_username"
+    )
+
+
+@pytest.mark.asyncio
+async def test_provision_users_reports_rows_left_by_hashing_outage(
+    db_session, monkeypatch
+):
+    logger.info(
+        "Début du test: "
+        "test_provision_users_reports_rows_left_by_hashing_outage"
+    )
+    unique = str(uuid4())[:8]
+    records = [
+        {
+            "username": f"outage{i}_{unique}",
+            "email": f"outage{i}_{unique}@example.com",
+            "password": "BulkPass!23",
+        }
+        for i in range(5)
+    ]
+    hash_many = provisioning.provisioning_hasher.hash_many
+    calls = []
+
+    async def failing_hash_many(passwords):
+        calls.append(len(passwords))
+        if len(calls) > 1:
+            raise PasswordHashingUnavailable("Pool de hachage saturé.")
+        return await hash_many(passwords)
+
+    monkeypatch.setattr(
+        provisioning.provisioning_hasher, "hash_many", failing_hash_many
+    )
+    result = await provision_users(db_session, records, batch_size=2)
+    assert result.created == 2
+    assert [f.row for f in result.failed] == [2, 3, 4]
+    assert {f.error for f in result.failed} == {HASHING_UNAVAILABLE_ERROR}
+
+    # Rien de créé : l'indisponibilité remonte telle quelle (503)
+    calls.append(None)
+    with pytest.raises(PasswordHashingUnavailable):
+        await provision_users(db_session, records[2:], batch_size=2)
+    logger.success(
+        "Fin du test: test_provision_users_reports_rows_left_by_hashing_outage"
+    )
+
+
+@pytest.mark.asyncio
+async def test_invalidate_identity_cache(
+    async_client, admin_user, normal_user
+):
+    logger.info("Début du test: test_invalidate_identity_cache")
+    headers = {"X-User": admin_user.username}
+    resp = await async_client.post(
+        "/admin/identity-cache/invalidate",
+        json={"usernames": [normal_user.username]},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    assert resp.json() == {"invalidated": 1}
+    resp = await async_client.post(
+        "/admin/identity-cache/invalidate",
+        json={"usernames": [admin_user.username]},
+        headers={"X-User": normal_user.username},
+    )
+    assert resp.status_code == 401
+    logger.success("Fin du test: test_invalidate_identity_cache")
@@ -52,3 +52,40 @@ async def test_login_and_refresh_cycle(async_client):
     )
     assert resp3.status_code == 401
     logger.info("Ancien refresh token invalidé comme attendu pour 'eve'")
+
+    # --- 6) La réutilisation révoque aussi le token issu de la rotation ---
+    resp4 = await async_client.post(
+        "/auth/refresh",
+        headers={"Authorization": f"Bearer {tok2['refresh_token']}"},
+    )
+    assert resp4.status_code == 401
+    logger.info("Session révoquée après réutilisation du refresh token")
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_tokens(async_client):
+    payload = {
+        "username": "mallory",
+        "email": "mallory@example.com",
+        "password": "MalloryPass!23",
+    }
+    resp = await async_client.post("/users/register", json=payload)
+    assert resp.status_code == 201, resp.text
+    resp = await async_client.post(
+        "/users/login",
+        json={"username": "mallory", "password": "MalloryPass!23"},
+    )
+    tok = resp.json()
+    resp = await async_client.post(
+        "/users/logout",
+        json={"refresh_token": tok["refresh_token"]},
+        headers={"Authorization": f"Bearer {tok['access_token']}"},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["revoked"] == 2
+    resp = await async_client.post(
+        "/auth/refresh",
+        headers={"Authorization": f"Bearer {tok['refresh_token']}"},
+    )
+    assert resp.status_code == 401
+    logger.info("Refresh token refusé après déconnexion de 'mallory'")
@@ -0,0 +1,28 @@
+import asyncio
+import pytest
+from api.ml.batcher import MicroBatcher
+from tests.utils.logger import logger
+
+
+@pytest.mark.asyncio
+async def test_stop_fails_batch_being_collected():
+    logger.info("Début du test: test_stop_fails_batch_being_collected")
+    calls = []
+
+    async def predict_fn(vectors):
+        calls.append(vectors)
+        return [(float(sum(v)), None) for v in vectors]
+
+    batcher = MicroBatcher(predict_fn, max_batch_size=8, max_wait_ms=10_000)
+    submits = [
+        asyncio.create_task(batcher.submit([1.0])),
+        asyncio.create_task(batcher.submit([2.0])),
+    ]
+    # Le lot attend d'autres requêtes jusqu'à l'échéance
+    await asyncio.sleep(0.01)
+    await batcher.stop()
+    for submit in submits:
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(submit, 1)
+    assert calls == []
+    logger.success("Fin du test: test_stop_fails_batch_being_collected")
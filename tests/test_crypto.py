@@ -0,0 +1,61 @@
+from api.core import crypto
+from api.core.crypto import (
+    decrypt_many,
+    decrypt_sensitive_data,
+    encrypt_many,
+    encrypt_sensitive_data,
+    generate_user_key,
+    get_fernet,
+    invalidate_fernet,
+)
+from tests.utils.logger import logger
+
+
+def test_fernet_cache_reuses_and_invalidates():
+    logger.info("Début du test: test_fernet_cache_reuses_and_invalidates")
+    key = generate_user_key()
+    fernet = get_fernet(key)
+    assert get_fernet(key) is fernet
+    invalidate_fernet(key)
+    assert get_fernet(key) is not fernet
+    logger.success("Fin du test: test_fernet_cache_reuses_and_invalidates")
+
+
+def test_fernet_cache_is_bounded(monkeypatch):
+    logger.info("Début du test: test_fernet_cache_is_bounded")
+    monkeypatch.setattr(crypto, "FERNET_CACHE_SIZE", 2)
+    crypto.clear_fernet_cache()
+    keys = [generate_user_key() for _ in range(3)]
+    for key in keys:
+        get_fernet(key)
+    assert list(crypto._fernet_cache) == keys[1:]
+    logger.success("Fin du test: test_fernet_cache_is_bounded")
+
+
+def test_encrypt_decrypt_many_for_several_users():
+    logger.info("Début du test: test_encrypt_decrypt_many_for_several_users")
+    key_a, key_b = generate_user_key(), generate_user_key()
+    items = [("bio a", key_a), ("bio b", key_b), ("clair", None)]
+    encrypted = encrypt_many(items)
+    assert encrypted[2] == "clair"
+    assert decrypt_sensitive_data(encrypted[1], key_b) == "bio b"
+    pairs = [(token, key) for token, (_, key) in zip(encrypted, items)]
+    pairs.append((encrypt_sensitive_data("autre", key_a), key_b))
+    assert decrypt_many(pairs) == ["bio a", "bio b", "clair", ""]
+    logger.success("Fin du test: test_encrypt_decrypt_many_for_several_users")
+
+
+def test_batch_helpers_do_not_evict_hot_keys(monkeypatch):
+    logger.info("Début du test: test_batch_helpers_do_not_evict_hot_keys")
+    monkeypatch.setattr(crypto, "FERNET_CACHE_SIZE", 2)
+    crypto.clear_fernet_cache()
+    hot_key = generate_user_key()
+    hot = get_fernet(hot_key)
+    items = [("bio", generate_user_key()) for _ in range(5)]
+    items.append(("bio chaude", hot_key))
+    encrypted = encrypt_many(items)
+    pairs = [(token, key) for token, (_, key) in zip(encrypted, items)]
+    assert decrypt_many(pairs) == [data for data, _ in items]
+    assert list(crypto._fernet_cache) == [hot_key]
+    assert get_fernet(hot_key) is hot
+    logger.success("Fin du test: test_batch_helpers_do_not_evict_hot_keys")
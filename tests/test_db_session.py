@@ -0,0 +1,39 @@
+import pytest
+from uuid import uuid4
+from sqlalchemy.future import select
+from api.db.models import User
+from api.db.session import get_db, has_pending_writes
+from tests.utils.logger import logger
+
+
+@pytest.mark.asyncio
+async def test_get_db_commits_only_pending_writes(db_session):
+    logger.info("Début du test: test_get_db_commits_only_pending_writes")
+    unique = str(uuid4())[:8]
+
+    dependency = get_db()
+    session = await anext(dependency)
+    await session.execute(select(User.id).limit(1))
+    assert not has_pending_writes(session)
+    await dependency.aclose()
+
+    dependency = get_db()
+    session = await anext(dependency)
+    session.add(
+        User(
+            username=f"erin_{unique}",
+            email=f"erin_{unique}@example.com",
+            hashed_password="x",
+        )
+    )
+    # L'autoflush vide `session.new` : l'écriture doit rester détectée
+    await session.execute(select(User.id).limit(1))
+    assert has_pending_writes(session)
+    with pytest.raises(StopAsyncIteration):
+        await anext(dependency)
+
+    result = await db_session.execute(
+        select(User.id).where(User.username == f"erin_{unique}")
+    )
+    assert result.scalar() is not None
+    logger.success("Fin du test: test_get_db_commits_only_pending_writes")
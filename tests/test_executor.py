@@ -0,0 +1,22 @@
+import pytest
+from api.ml.executor import InferenceExecutor
+from api.ml.generation import generate_text
+from tests.utils.logger import logger
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["inline", "thread", "process"])
+async def test_executor_modes(mode):
+    logger.info(f"Début du test: test_executor_modes[{mode}]")
+    executor = InferenceExecutor(mode, max_workers=2)
+    executor.start()
+    try:
+        results = await executor.predict_batch([[1.0, 2.0, 3.0], [], [4.0]])
+        generated = await executor.run(generate_text, "test prompt")
+    finally:
+        executor.shutdown()
+    assert results[0] == (2.0, None)
+    assert results[1][0] is None
+    assert results[2] == (4.0, None)
+    assert "test prompt" in generated
+    logger.success(f"Fin du test: test_executor_modes[{mode}]")
@@ -0,0 +1,95 @@
+import asyncio
+import time
+import pytest
+from api.core.hashing import (
+    PasswordHasher,
+    PasswordHashingUnavailable,
+    calibrate_rounds,
+    check_password,
+    hash_password,
+    hash_rounds,
+)
+from tests.utils.logger import logger
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["thread", "process"])
+async def test_password_hasher_modes(mode):
+    logger.info(f"Début du test: test_password_hasher_modes[{mode}]")
+    hasher = PasswordHasher(mode, max_workers=2)
+    hasher.start()
+    try:
+        hashed = await hasher.hash("secret")
+        valid = await hasher.verify("secret", hashed)
+        invalid = await hasher.verify("wrong", hashed)
+    finally:
+        hasher.shutdown()
+    assert valid and not invalid
+    logger.success(f"Fin du test: test_password_hasher_modes[{mode}]")
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_keeps_event_loop_responsive():
+    logger.info(
+        "Début du test: test_password_hasher_keeps_event_loop_responsive"
+    )
+    hashed = hash_password("secret")
+    hasher = PasswordHasher("thread", max_workers=2, max_pending=2)
+
+    async def worst_lag():
+        worst = 0.0
+        for _ in range(20):
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            worst = max(worst, time.perf_counter() - started)
+        return worst
+
+    try:
+        lag, *results = await asyncio.gather(
+            worst_lag(),
+            *[hasher.verify("secret", hashed) for _ in range(6)],
+            return_exceptions=True,
+        )
+    finally:
+        hasher.shutdown()
+    assert lag < 0.1
+    assert results.count(True) == 4
+    assert sum(isinstance(r, PasswordHashingUnavailable) for r in results) == 2
+    logger.success(
+        "Fin du test: test_password_hasher_keeps_event_loop_responsive"
+    )
+
+
+@pytest.mark.asyncio
+async def test_calibration_and_rehash_detection():
+    logger.info("Début du test: test_calibration_and_rehash_detection")
+    rounds, elapsed_ms = calibrate_rounds(
+        target_ms=10_000, min_rounds=4, max_rounds=6
+    )
+    assert rounds == 6 and elapsed_ms > 0
+    hasher = PasswordHasher("thread", max_workers=1)
+    hasher.rounds = 5
+    try:
+        hashed = await hasher.hash("secret")
+        assert await hasher.calibrate(target_ms=0) == 10
+    finally:
+        hasher.shutdown()
+    assert hash_rounds(hashed) == 5
+    assert hasher.needs_rehash(hashed)
+    assert not hasher.needs_rehash(hash_password("secret", rounds=10))
+    logger.success("Fin du test: test_calibration_and_rehash_detection")
+
+
+@pytest.mark.asyncio
+async def test_hash_many_keeps_order():
+    logger.info("Début du test: test_hash_many_keeps_order")
+    hasher = PasswordHasher("thread", max_workers=3, max_pending=0)
+    hasher.rounds = 4
+    passwords = [f"secret-{i}" for i in range(7)]
+    try:
+        hashes = await hasher.hash_many(passwords)
+    finally:
+        hasher.shutdown()
+    assert len(hashes) == 7
+    assert all(map(check_password, passwords, hashes))
+    logger.success("Fin du test: test_hash_many_keeps_order")
@@ -0,0 +1,28 @@
+import pytest
+from uuid import uuid4
+from api.core.identity import UserIdentityCache
+from api.db.services import create_user
+from tests.utils.logger import logger
+
+
+@pytest.mark.asyncio
+async def test_identity_cache_hits_and_invalidation(db_session):
+    logger.info("Début du test: test_identity_cache_hits_and_invalidation")
+    unique = str(uuid4())[:8]
+    user = await create_user(
+        db_session,
+        username=f"carol_{unique}",
+        email=f"carol_{unique}@example.com",
+        password="CarolPass!23",
+    )
+    cache = UserIdentityCache(max_entries=10, ttl_seconds=60)
+    first = await cache.get(db_session, user.username)
+    second = await cache.get(db_session, user.username)
+    assert first is second
+    assert first.id == user.id and first.role == "user"
+    assert cache.stats()["hits"] == 1
+    cache.invalidate(user.username)
+    assert await cache.get(db_session, user.username) is not first
+    assert await cache.get(db_session, f"ghost_{unique}") is None
+    assert cache.stats()["misses"] == 3
+    logger.success("Fin du test: test_identity_cache_hits_and_invalidation")
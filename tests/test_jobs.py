@@ -0,0 +1,44 @@
+import queue
+from api.ml.jobs import RetrainJob, RetrainJobManager
+from tests.utils.logger import logger
+
+
+class ExitedProcess:
+    exitcode = 0
+
+    def is_alive(self):
+        return False
+
+    def join(self, timeout=None):
+        pass
+
+
+class LateEvents:
+    """File dont les événements arrivent après l'expiration de `get`."""
+
+    def __init__(self, events):
+        self.events = list(events)
+
+    def get(self, timeout=None):
+        raise queue.Empty
+
+    def get_nowait(self):
+        if not self.events:
+            raise queue.Empty
+        return self.events.pop(0)
+
+
+def test_monitor_drains_events_after_exit():
+    logger.info("Début du test: test_monitor_drains_events_after_exit")
+    manager = RetrainJobManager()
+    job = RetrainJob(id="late")
+    events = LateEvents(
+        [
+            ("running", 0.0, "Entraînement démarré"),
+            ("succeeded", 1.0, {"mse": 0.5}),
+        ]
+    )
+    manager._monitor(job, ExitedProcess(), events)
+    assert job.status == "succeeded"
+    assert job.result == {"mse": 0.5} and job.error is None
+    logger.success("Fin du test: test_monitor_drains_events_after_exit")
@@ -0,0 +1,129 @@
+import json
+import pytest
+from uuid import uuid4
+from sqlalchemy.future import select
+from api.core.crypto import decrypt_sensitive_data, encrypt_sensitive_data
+from api.core import key_rotation
+from api.core.key_rotation import rotate_keys
+from api.db.models import User, UserSensitiveData
+from api.db.services import create_user
+from tests.utils.logger import logger
+
+
+@pytest.mark.asyncio
+async def test_rotate_keys_reencrypts_and_resumes(db_session, tmp_path):
+    logger.info("Début du test: test_rotate_keys_reencrypts_and_resumes")
+    unique = str(uuid4())[:8]
+    user = await create_user(
+        db_session,
+        username=f"dave_{unique}",
+        email=f"dave_{unique}@example.com",
+        password="DavePass!23",
+    )
+    admin = await create_user(
+        db_session,
+        username=f"admin_{unique}",
+        email=f"admin_{unique}@example.com",
+        password="AdminPass!23",
+        role="admin",
+    )
+    old_key = user.encryption_key
+    db_session.add(
+        UserSensitiveData(
+            user_id=user.id,
+            encrypted_bio=encrypt_sensitive_data("Ma bio", old_key),
+        )
+    )
+    await db_session.commit()
+    checkpoint = tmp_path / "rotation.json"
+
+    report = await rotate_keys(
+        batch_size=2,
+        max_rows_per_second=0,
+        checkpoint=str(checkpoint),
+        admin_user=admin.username,
+    )
+    assert report.rotated >= 1 and report.conflicts == 0
+    # Identités basculées retirées du cache de l'API
+    assert report.unnotified == 0
+    assert json.loads(checkpoint.read_text())["last_id"] >= user.id
+
+    db_session.expire_all()
+    new_key, encrypted_bio = (
+        await db_session.execute(
+            select(User.encryption_key, UserSensitiveData.encrypted_bio)
+            .join(UserSensitiveData, UserSensitiveData.user_id == User.id)
+            .where(User.id == user.id)
+        )
+    ).one()
+    assert new_key != old_key
+    assert decrypt_sensitive_data(encrypted_bio, new_key) == "Ma bio"
+
+    # Reprise : tout est déjà traité
+    resumed = await rotate_keys(
+        max_rows_per_second=0, checkpoint=str(checkpoint), api_url=None
+    )
+    assert resumed.scanned == 0
+    logger.success("Fin du test: test_rotate_keys_reencrypts_and_resumes")
+
+
+@pytest.mark.asyncio
+async def test_rotate_keys_resumes_failed_batch(
+    db_session, tmp_path, monkeypatch
+):
+    logger.info("Début du test: test_rotate_keys_resumes_failed_batch")
+    unique = str(uuid4())[:8]
+    users = [
+        await create_user(
+            db_session,
+            username=f"{name}_{unique}",
+            email=f"{name}_{unique}@example.com",
+            password="RotatePass!23",
+        )
+        for name in ("frank", "grace")
+    ]
+    old_keys = [user.encryption_key for user in users]
+    checkpoint = tmp_path / "rotation.json"
+    checkpoint.write_text(json.dumps({"last_id": users[0].id - 1}))
+
+    apply_rotation = key_rotation.apply_rotation
+
+    async def failing_apply(db, rotated):
+        if any(r.user_id == users[1].id for r in rotated):
+            raise RuntimeError("panne simulée")
+        return await apply_rotation(db, rotated)
+
+    monkeypatch.setattr(key_rotation, "apply_rotation", failing_apply)
+    report = await rotate_keys(
+        batch_size=1,
+        max_rows_per_second=0,
+        checkpoint=str(checkpoint),
+        api_url=None,
+    )
+    assert report.error is not None
+    # Le point de reprise reste sur le dernier lot validé
+    assert json.loads(checkpoint.read_text())["last_id"] == users[0].id
+
+    monkeypatch.setattr(key_rotation, "apply_rotation", apply_rotation)
+    resumed = await rotate_keys(
+        batch_size=1,
+        max_rows_per_second=0,
+        checkpoint=str(checkpoint),
+        api_url=None,
+    )
+    assert resumed.error is None and resumed.rotated >= 1
+
+    db_session.expire_all()
+    keys = (
+        (
+            await db_session.execute(
+                select(User.encryption_key)
+                .where(User.id.in_([user.id for user in users]))
+                .order_by(User.id)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    assert keys[0] != old_keys[0] and keys[1] != old_keys[1]
+    logger.success("Fin du test: test_rotate_keys_resumes_failed_batch")
@@ -1,5 +1,9 @@
+import asyncio
+import json
 import pytest
 import httpx
+import numpy as np
+import pyarrow as pa
 from unittest.mock import patch, MagicMock
 from asgi_lifespan import LifespanManager
 from api.main import app
@@ -89,7 +93,176 @@ async def test_retrain():
             transport=httpx.ASGITransport(app=app), base_url="http://test"
         ) as ac:
             response = await ac.post("/retrain")
-    assert response.status_code == 200
+    assert response.status_code == 202
     data = response.json()
-    assert data.get("message") == "Retrain déclenché (simulation)"
+    assert data["job_id"]
+    assert data["status"] in ("queued", "running")
     logger.success("Fin du test: test_retrain")
+
+
+@pytest.mark.asyncio
+async def test_predict_batch_ragged():
+    logger.info("Début du test: test_predict_batch_ragged")
+    async with LifespanManager(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as ac:
+            response = await ac.post(
+                "/predict/batch",
+                json={"data": [[1.0, 2.0, 3.0], [], [4.0]]},
+            )
+    assert response.status_code == 200
+    predictions = response.json()["predictions"]
+    assert len(predictions) == 3
+    assert abs(predictions[0]["prediction"] - 2.0) < 1e-6
+    assert predictions[1]["prediction"] is None
+    assert predictions[1]["error"]
+    assert abs(predictions[2]["prediction"] - 4.0) < 1e-6
+    logger.success("Fin du test: test_predict_batch_ragged")
+
+
+@pytest.mark.asyncio
+async def test_predict_batch_empty():
+    logger.info("Début du test: test_predict_batch_empty")
+    async with LifespanManager(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as ac:
+            response = await ac.post("/predict/batch", json={"data": []})
+    assert response.status_code == 400
+    assert "Erreur lors de la prédiction" in response.text
+    logger.success("Fin du test: test_predict_batch_empty")
+
+
+@pytest.mark.asyncio
+async def test_predict_concurrent_microbatch():
+    logger.info("Début du test: test_predict_concurrent_microbatch")
+    async with LifespanManager(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as ac:
+            responses = await asyncio.gather(
+                *[
+                    ac.post("/predict", json={"data": [float(i), i + 2.0]})
+                    for i in range(20)
+                ]
+            )
+    for i, response in enumerate(responses):
+        assert response.status_code == 200
+        assert abs(response.json()["prediction"] - (i + 1.0)) < 1e-6
+    logger.success("Fin du test: test_predict_concurrent_microbatch")
+
+
+@pytest.mark.asyncio
+async def test_generate_stream_ndjson():
+    logger.info("Début du test: test_generate_stream_ndjson")
+    async with LifespanManager(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as ac:
+            response = await ac.post(
+                "/generate/stream", json={"prompt": "test prompt"}
+            )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[-1] == {"done": True, "tokens": len(lines) - 1}
+    assert "test prompt" in "".join(line["token"] for line in lines[:-1])
+    logger.success("Fin du test: test_generate_stream_ndjson")
+
+
+@pytest.mark.asyncio
+async def test_retrain_status_and_dedup():
+    logger.info("Début du test: test_retrain_status_and_dedup")
+    async with LifespanManager(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as ac:
+            first = await ac.post("/retrain")
+            second = await ac.post("/retrain")
+            job_id = first.json()["job_id"]
+            status_resp = await ac.get(f"/retrain/{job_id}")
+            cancel_resp = await ac.delete(f"/retrain/{job_id}")
+            unknown = await ac.get("/retrain/inconnu")
+    assert second.json()["job_id"] == job_id
+    assert second.json()["deduplicated"] is True
+    assert status_resp.status_code == 200
+    assert status_resp.json()["id"] == job_id
+    assert cancel_resp.status_code == 200
+    assert unknown.status_code == 404
+    logger.success("Fin du test: test_retrain_status_and_dedup")
+
+
+@pytest.mark.asyncio
+async def test_predict_stream_csv_reports_bad_rows():
+    logger.info("Début du test: test_predict_stream_csv_reports_bad_rows")
+    body = "a,b\n1,2\n3,x\n5\n"
+    async with LifespanManager(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as ac:
+            response = await ac.post(
+                "/predict/stream",
+                content=body,
+                headers={"Content-Type": "text/csv"},
+            )
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0] == {"row": 2, "prediction": 1.5}
+    assert lines[1]["row"] == 3 and "error" in lines[1]
+    assert lines[2] == {"row": 4, "prediction": 5.0}
+    assert lines[-1]["done"] is True
+    assert lines[-1]["rows"] == 3 and lines[-1]["errors"] == 1
+    logger.success("Fin du test: test_predict_stream_csv_reports_bad_rows")
+
+
+@pytest.mark.asyncio
+async def test_predict_raw_float32_payload():
+    logger.info("Début du test: test_predict_raw_float32_payload")
+    body = np.array([1.0, 2.0, 3.0], dtype="<f4").tobytes()
+    async with LifespanManager(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as ac:
+            response = await ac.post(
+                "/predict",
+                content=body,
+                headers={
+                    "Content-Type": "application/octet-stream; dtype=float32"
+                },
+            )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(
+        "application/octet-stream"
+    )
+    assert np.frombuffer(response.content, dtype="<f8").tolist() == [2.0]
+    logger.success("Fin du test: test_predict_raw_float32_payload")
+
+
+@pytest.mark.asyncio
+async def test_predict_batch_arrow_payload():
+    logger.info("Début du test: test_predict_batch_arrow_payload")
+    batch = pa.record_batch(
+        [pa.array([[1.0, 2.0], [3.0], []], type=pa.list_(pa.float64()))],
+        names=["data"],
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    async with LifespanManager(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as ac:
+            response = await ac.post(
+                "/predict/batch",
+                content=sink.getvalue().to_pybytes(),
+                headers={
+                    "Content-Type": "application/vnd.apache.arrow.stream",
+                    "Accept": "application/json",
+                },
+            )
+    assert response.status_code == 200
+    predictions = response.json()["predictions"]
+    assert [p["prediction"] for p in predictions] == [1.5, 3.0, None]
+    assert predictions[2]["error"]
+    logger.success("Fin du test: test_predict_batch_arrow_payload")
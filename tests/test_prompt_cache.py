@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from api.ml.cache import PromptCache
+from tests.utils.logger import logger
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_prompts_compute_once():
+    logger.info(
+        "Début du test: test_concurrent_identical_prompts_compute_once"
+    )
+    cache = PromptCache(max_entries=10, ttl_seconds=60)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "résultat"
+
+    results = await asyncio.gather(
+        *[
+            cache.get_or_compute("  hello   world ", "v1", compute)
+            for _ in range(10)
+        ]
+    )
+    assert results == ["résultat"] * 10
+    assert calls == 1
+    assert await cache.get_or_compute("hello world", "v1", compute)
+    assert calls == 1
+    await cache.get_or_compute("hello world", "v2", compute)
+    assert calls == 2
+    logger.success(
+        "Fin du test: test_concurrent_identical_prompts_compute_once"
+    )
+
+
+@pytest.mark.asyncio
+async def test_lru_and_ttl_eviction():
+    logger.info("Début du test: test_lru_and_ttl_eviction")
+    cache = PromptCache(max_entries=2, ttl_seconds=0.05)
+
+    async def compute():
+        return "ok"
+
+    for prompt in ("a", "b", "c"):
+        await cache.get_or_compute(prompt, "v1", compute)
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 1
+    await asyncio.sleep(0.1)
+    await cache.get_or_compute("c", "v1", compute)
+    assert cache.stats()["misses"] == 4
+    assert cache.purge() == 2
+    logger.success("Fin du test: test_lru_and_ttl_eviction")
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_fail_followers():
+    logger.info("Début du test: test_cancelled_leader_does_not_fail_followers")
+    cache = PromptCache(max_entries=10, ttl_seconds=60)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "résultat"
+
+    leader = asyncio.create_task(cache.get_or_compute("p", "v1", compute))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(cache.get_or_compute("p", "v1", compute))
+    await asyncio.sleep(0)
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert await follower == "résultat"
+    assert calls == 1
+    assert cache.stats()["inflight"] == 0
+    assert await cache.get_or_compute("p", "v1", compute) == "résultat"
+    assert calls == 1
+    logger.success(
+        "Fin du test: test_cancelled_leader_does_not_fail_followers"
+    )
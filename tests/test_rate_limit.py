@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta, timezone
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from jose import jwt
+from api.core import ratelimit
+from api.core.hashing import PasswordHasher
+from api.core.ratelimit import TokenBucketLimiter, auth_admission
+from api.core.tokens import ALGORITHM, create_access_token
+from tests.utils.logger import logger
+
+
+def test_token_bucket_burst_and_refill(monkeypatch):
+    logger.info("Début du test: test_token_bucket_burst_and_refill")
+    now = [100.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    limiter = TokenBucketLimiter(rate=2, burst=3, shards=4, max_keys=8)
+    assert [limiter.acquire("1.2.3.4") for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire("1.2.3.4") == 0.5
+    # Les autres clés ont leur propre seau
+    assert limiter.acquire("5.6.7.8") == 0
+    now[0] += 0.5
+    assert limiter.acquire("1.2.3.4") == 0
+    assert limiter.acquire("1.2.3.4") > 0
+    logger.success("Fin du test: test_token_bucket_burst_and_refill")
+
+
+def test_auth_admission_rejects_before_handler(monkeypatch):
+    logger.info("Début du test: test_auth_admission_rejects_before_handler")
+    monkeypatch.setattr(
+        ratelimit, "ip_limiter", TokenBucketLimiter(rate=1, burst=3)
+    )
+    monkeypatch.setattr(
+        ratelimit, "user_limiter", TokenBucketLimiter(rate=1, burst=1)
+    )
+    hasher = PasswordHasher(max_workers=1, max_pending=0)
+    monkeypatch.setattr(ratelimit, "password_hasher", hasher)
+    calls = []
+    app = FastAPI()
+
+    @app.post(
+        "/login",
+        dependencies=[Depends(auth_admission("login", uses_hashing=True))],
+    )
+    async def login(payload: dict):
+        calls.append(payload["username"])
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.post("/login", json={"username": "alice"}).status_code == 200
+    response = client.post("/login", json={"username": "alice"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    # Pool bcrypt plein : délestage sans appeler la route
+    hasher._in_flight = 1
+    response = client.post("/login", json={"username": "bob"})
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    hasher._in_flight = 0
+    # Réserve de l'IP épuisée, quel que soit le username
+    assert client.post("/login", json={"username": "carol"}).status_code == 429
+    assert calls == ["alice"]
+    logger.success("Fin du test: test_auth_admission_rejects_before_handler")
+
+
+def test_forged_bearer_does_not_drain_user_bucket(monkeypatch):
+    logger.info("Début du test: test_forged_bearer_does_not_drain_user_bucket")
+    monkeypatch.setattr(
+        ratelimit, "ip_limiter", TokenBucketLimiter(rate=0, burst=1)
+    )
+    monkeypatch.setattr(
+        ratelimit, "user_limiter", TokenBucketLimiter(rate=1, burst=1)
+    )
+    app = FastAPI()
+
+    @app.post("/refresh", dependencies=[Depends(auth_admission("refresh"))])
+    async def refresh():
+        return {"ok": True}
+
+    client = TestClient(app)
+    forged = jwt.encode(
+        {"sub": "alice", "exp": datetime.now(timezone.utc) + timedelta(1)},
+        "pas_le_bon_secret",
+        algorithm=ALGORITHM,
+    )
+    for _ in range(3):
+        response = client.post(
+            "/refresh", headers={"Authorization": f"Bearer {forged}"}
+        )
+        assert response.status_code == 200
+    # Le seau d'alice est intact : son vrai token passe toujours
+    genuine = create_access_token({"sub": "alice"}, timedelta(minutes=5))
+    response = client.post(
+        "/refresh", headers={"Authorization": f"Bearer {genuine}"}
+    )
+    assert response.status_code == 200
+    response = client.post(
+        "/refresh", headers={"Authorization": f"Bearer {genuine}"}
+    )
+    assert response.status_code == 429
+    logger.success(
+        "Fin du test: test_forged_bearer_does_not_drain_user_bucket"
+    )
@@ -0,0 +1,90 @@
+import joblib
+import numpy as np
+import pytest
+import api.ml.registry as registry_module
+from api.ml.predictor import predict_batch
+from api.ml.registry import ModelRegistry, VectorModel
+from tests.utils.logger import logger
+
+
+class SumModel:
+    """Modèle tabulaire factice : somme de chaque ligne."""
+
+    def predict(self, matrix):
+        return np.asarray(matrix).sum(axis=1)
+
+
+class StrictModel:
+    """Modèle à largeur fixe, comme un estimateur scikit-learn entraîné."""
+
+    n_features_in_ = 3
+
+    def predict(self, matrix):
+        matrix = np.asarray(matrix)
+        if matrix.shape[1] != self.n_features_in_:
+            raise ValueError(f"{self.n_features_in_} colonnes attendues")
+        return matrix.sum(axis=1)
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    for version in ("1", "2"):
+        path = tmp_path / "somme" / version
+        path.mkdir(parents=True)
+        joblib.dump(SumModel(), path / "model.joblib")
+    strict = tmp_path / "strict" / "1"
+    strict.mkdir(parents=True)
+    joblib.dump(StrictModel(), strict / "model.joblib")
+    monkeypatch.setattr(registry_module, "MODEL_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_activate_local_model_and_rollback(model_dir):
+    logger.info("Début du test: test_activate_local_model_and_rollback")
+    registry = ModelRegistry()
+    await registry.activate("somme", "1", "local")
+    results = predict_batch([[1.0, 2.0], [3.0], []], registry.current())
+    assert results[0] == (3.0, None)
+    assert results[1] == (3.0, None)
+    assert results[2][0] is None
+    await registry.activate("mean", "builtin", "builtin")
+    assert predict_batch([[1.0, 2.0]], registry.current()) == [(1.5, None)]
+    logger.success("Fin du test: test_activate_local_model_and_rollback")
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used(model_dir):
+    logger.info("Début du test: test_cache_evicts_least_recently_used")
+    registry = ModelRegistry(max_bytes=1)
+    await registry.activate("somme", "1", "local")
+    await registry.activate("somme", "2", "local")
+    cached = [(m["name"], m["version"]) for m in registry.cached()]
+    assert cached == [("somme", "2")]
+    assert registry.active.version == "2"
+    logger.success("Fin du test: test_cache_evicts_least_recently_used")
+
+
+@pytest.mark.asyncio
+async def test_warm_up_uses_model_width(model_dir):
+    logger.info("Début du test: test_warm_up_uses_model_width")
+    registry = ModelRegistry()
+    await registry.activate("strict", "1", "local")
+    assert registry.current().n_features == 3
+    assert predict_batch([[1.0, 2.0, 3.0]], registry.current()) == [
+        (6.0, None)
+    ]
+    logger.success("Fin du test: test_warm_up_uses_model_width")
+
+
+def test_wrong_width_fails_only_its_vectors():
+    logger.info("Début du test: test_wrong_width_fails_only_its_vectors")
+    model = VectorModel(StrictModel())
+    vectors = [[1.0, 2.0, 3.0], [1.0, 2.0], [4.0, 5.0, 6.0]]
+    predictions = model.predict([np.asarray(v) for v in vectors])
+    assert predictions[0] == 6.0 and predictions[2] == 15.0
+    assert np.isnan(predictions[1])
+    results = predict_batch(vectors, model)
+    assert results[0] == (6.0, None) and results[2] == (15.0, None)
+    assert results[1][0] is None and "3 valeurs" in results[1][1]
+    logger.success("Fin du test: test_wrong_width_fails_only_its_vectors")
@@ -0,0 +1,22 @@
+import time
+import pytest
+from uuid import uuid4
+from api.core.revocation import RevocationStore
+from tests.utils.logger import logger
+
+
+@pytest.mark.asyncio
+async def test_revocation_propagates_and_compacts(db_session):
+    logger.info("Début du test: test_revocation_propagates_and_compacts")
+    writer, reader = RevocationStore(), RevocationStore()
+    active, expired = str(uuid4()), str(uuid4())
+    await writer.revoke(db_session, active, time.time() + 60, "eve")
+    await writer.revoke(db_session, expired, time.time() - 60, "eve")
+    assert writer.is_revoked(active)
+    assert not reader.is_revoked(active)
+    await reader.sync()
+    assert reader.is_revoked(active)
+    assert not reader.is_revoked(expired)
+    assert await writer.compact() == 1
+    assert writer.is_revoked(active) and not writer.is_revoked(expired)
+    logger.success("Fin du test: test_revocation_propagates_and_compacts")
@@ -0,0 +1,52 @@
+import time
+from datetime import timedelta
+import pytest
+from fastapi import HTTPException
+from fastapi.security import SecurityScopes
+from api.core import security
+from api.core.security import get_current_user_with_scopes
+from api.core.token_cache import VerifiedToken, VerifiedTokenCache
+from api.core.tokens import create_access_token
+from tests.utils.logger import logger
+
+
+def make_verified(username="alice", jti="jti-1", ttl=60.0):
+    scopes = ("read:profile",)
+    return VerifiedToken(
+        username, scopes, frozenset(scopes), jti, time.time() + ttl
+    )
+
+
+def test_token_cache_expiry_and_revocation():
+    logger.info("Début du test: test_token_cache_expiry_and_revocation")
+    cache = VerifiedTokenCache(max_entries=10)
+    cache.put("token-a", make_verified(jti="a"))
+    cache.put("token-b", make_verified(jti="b"))
+    cache.put("token-c", make_verified(username="bob", jti="c"))
+    cache.put("token-old", make_verified(jti="old", ttl=-1))
+    assert cache.get("token-a").jti == "a"
+    assert cache.get("token-old") is None
+    cache.evict_jti("a")
+    assert cache.get("token-a") is None
+    cache.evict_user("alice")
+    assert cache.get("token-b") is None
+    assert cache.get("token-c").username == "bob"
+    logger.success("Fin du test: test_token_cache_expiry_and_revocation")
+
+
+def test_get_current_user_with_scopes_uses_cache(monkeypatch):
+    logger.info("Début du test: test_get_current_user_with_scopes_uses_cache")
+    cache = VerifiedTokenCache(max_entries=10)
+    monkeypatch.setattr(security, "token_cache", cache)
+    token = create_access_token(
+        {"sub": "alice", "scopes": ["read:profile"]}, timedelta(minutes=5)
+    )
+    scopes = SecurityScopes(["read:profile"])
+    assert get_current_user_with_scopes(scopes, token)["username"] == "alice"
+    assert len(cache) == 1
+    monkeypatch.setattr(security, "verify_token", None)
+    assert get_current_user_with_scopes(scopes, token)["username"] == "alice"
+    with pytest.raises(HTTPException) as exc_info:
+        get_current_user_with_scopes(SecurityScopes(["admin"]), token)
+    assert exc_info.value.status_code == 403
+    logger.success("Fin du test: test_get_current_user_with_scopes_uses_cache")
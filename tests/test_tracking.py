@@ -0,0 +1,54 @@
+import os
+import threading
+import time
+from api.ml.tracking import LocalFileSink, WriteBehindTracker
+from tests.utils.logger import logger
+
+
+def test_write_behind_flushes_to_local_store(tmp_path):
+    logger.info("Début du test: test_write_behind_flushes_to_local_store")
+    sink = LocalFileSink(str(tmp_path / "mlflow_events.jsonl"))
+    tracker = WriteBehindTracker(sink, batch_size=10, flush_interval=0.05)
+    tracker.start()
+    for i in range(25):
+        assert tracker.log_run(
+            "predict", params={"nb_inputs": i}, metrics={"prediction": i}
+        )
+    tracker.stop(timeout=5)
+    events = sink.read()
+    assert len(events) == 25
+    assert events[0].run_name == "predict"
+    assert events[-1].metrics == {"prediction": 24}
+    logger.success("Fin du test: test_write_behind_flushes_to_local_store")
+
+
+class BlockingSink(LocalFileSink):
+    """Sink local qui reste bloqué tant que `release` n'est pas levé."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.release = threading.Event()
+
+    def write(self, events):
+        self.release.wait(5)
+        super().write(events)
+
+
+def test_write_behind_spills_when_full(tmp_path):
+    logger.info("Début du test: test_write_behind_spills_when_full")
+    sink = BlockingSink(str(tmp_path / "mlflow_events.jsonl"))
+    spill_path = str(tmp_path / "spill.jsonl")
+    tracker = WriteBehindTracker(
+        sink, max_queue_size=1, flush_interval=0.05, spill_path=spill_path
+    )
+    assert tracker.log_run("retrain", metrics={"status": 1})
+    time.sleep(0.2)  # le worker est bloqué sur le premier événement
+    assert tracker.log_run("retrain", metrics={"status": 2})
+    assert not tracker.log_run("retrain", metrics={"status": 3})
+    assert os.path.exists(spill_path)
+    sink.release.set()
+    tracker.stop(timeout=5)
+    tracker._replay_spill()
+    statuses = sorted(e.metrics["status"] for e in sink.read())
+    assert statuses == [1, 2, 3]
+    logger.success("Fin du test: test_write_behind_spills_when_full")